@@ -0,0 +1,211 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+from datetime import datetime
+from collections import defaultdict
+
+from fake_telegram import FakeTelegramClient, load_conversations
+from inference import InferenceEngine, MAX_BATCH_SIZE
+from scan_service import ScanService, PUSH_DEBOUNCE
+from telegram_io import FETCH_CONCURRENCY
+from scheduler import ScanScheduler, REQUEST_RATE
+from model_loader import load_model, MODEL_PATH, BACKEND
+from prefilter import load_prefilter
+
+DATASETS = ('final_set.csv', 'set_processed.csv')
+BATCH_SIZES = (1, 4, 8, 16, 32)
+SEQ_LENGTHS = (64, 128, 256, 512)
+OUTPUT_FILE = 'bench_results.json'
+
+
+def percentiles(samples):
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        'count': len(ordered),
+        'mean_ms': sum(ordered) / len(ordered) * 1000,
+        'p50_ms': pick(0.50),
+        'p90_ms': pick(0.90),
+        'p99_ms': pick(0.99),
+        'max_ms': ordered[-1] * 1000,
+    }
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def bench_scan(args, conversations, tokenizer, classifier, prefilter, workdir):
+    client = FakeTelegramClient(conversations, latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+                                flood_rate=args.flood_rate)
+    engine = InferenceEngine(lambda: (tokenizer, classifier), max_batch_size=args.max_batch_size,
+                             prefilter_loader=lambda: prefilter)
+    stages = defaultdict(list)
+    service = ScanService(client, engine, workdir, args.concurrency,
+                          stage_hook=lambda name, seconds: stages[name].append(seconds),
+                          push_debounce=args.push_debounce_ms / 1000, scheduler=ScanScheduler(args.rate))
+    delivered = {}
+
+    def on_event(event, payload):
+        if event == 'result':
+            delivered[payload['entry']['chat_id']] = time.perf_counter()
+
+    service.add_listener(on_event)
+
+    async def timed_scan():
+        started = time.perf_counter()
+        counts = await service.full_scan()
+        counts['seconds'] = time.perf_counter() - started
+        return counts
+
+    async def run():
+        results = {'cold': await timed_scan()}
+        results['cold']['requests'] = client.requests
+        results['cold']['flood_waits'] = client.flood_waits
+        results['warm'] = await timed_scan()
+        for peer_id in random.Random(0).sample(sorted(client.dialogs), max(1, len(client.dialogs) // 10)):
+            await client.inject_message(peer_id, '여기 사이트에 들어가서 계좌 번호 입력해줘')
+        results['incremental'] = await timed_scan()
+        results['push'] = await push_latency()
+        return results
+
+    async def push_latency():
+        # 새 메시지 이벤트부터 판정 결과가 나오기까지의 지연 (메시지 3개씩 연달아 도착)
+        service.push_enabled = True
+        delivered.clear()
+        requests = client.requests
+        sent = {}
+        for peer_id in random.Random(1).sample(sorted(client.dialogs), max(1, len(client.dialogs) // 10)):
+            for _ in range(3):
+                await client.inject_message(peer_id, '지금 바로 송금해줘')
+                await asyncio.sleep(args.push_debounce_ms / 4000)
+            sent[peer_id] = time.perf_counter()
+        deadline = time.perf_counter() + 60
+        while len(delivered) < len(sent) and time.perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+        service.push_enabled = False
+        return {
+            'chats': len(sent),
+            'delivered': len(delivered),
+            'requests': client.requests - requests,
+            'latency': percentiles([delivered[p] - sent[p] for p in sent if p in delivered]),
+        }
+
+    try:
+        scans = asyncio.run(run())
+    finally:
+        engine.close()
+        service.close()
+    return {
+        'dialogs': len(conversations),
+        'latency_ms': args.latency_ms,
+        'concurrency': args.concurrency,
+        'scans': scans,
+        'prefiltered': engine.prefiltered,
+        'forwarded': engine.forwarded,
+        'stages': {name: percentiles(samples) for name, samples in stages.items()},
+    }
+
+
+def bench_throughput(classifier, tokenizer, batch_sizes, seq_lengths, repeats):
+    rng = random.Random(0)
+    low = max(tokenizer.all_special_ids) + 1
+    results = []
+    for seq_length in seq_lengths:
+        for batch_size in batch_sizes:
+            rows = [[tokenizer.cls_token_id] + [rng.randrange(low, tokenizer.vocab_size) for _ in range(seq_length - 2)]
+                    + [tokenizer.sep_token_id] for _ in range(batch_size)]
+            classifier.predict(rows)
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                classifier.predict(rows)
+                timings.append(time.perf_counter() - started)
+            results.append({
+                'seq_length': seq_length,
+                'batch_size': batch_size,
+                'latency': percentiles(timings),
+                'samples_per_sec': batch_size * len(timings) / sum(timings),
+            })
+    return results
+
+
+def parse_ints(value):
+    return tuple(int(v) for v in value.split(','))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='2Racker 오프라인 성능 벤치마크 (네트워크 불필요)')
+    parser.add_argument('--model-path', default=MODEL_PATH)
+    parser.add_argument('--backend', default=BACKEND)
+    parser.add_argument('--datasets', nargs='+', default=list(DATASETS))
+    parser.add_argument('--dialogs', type=int, default=0, help='0이면 데이터셋 대화 수 그대로 사용')
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--jitter-ms', type=float, default=20.0)
+    parser.add_argument('--concurrency', type=int, default=FETCH_CONCURRENCY)
+    parser.add_argument('--rate', type=float, default=REQUEST_RATE, help='초당 요청 수 제한 (0이면 제한 없음)')
+    parser.add_argument('--flood-rate', type=int, default=0, help='가짜 서버가 FloodWait를 내는 초당 요청 수')
+    parser.add_argument('--push-debounce-ms', type=float, default=PUSH_DEBOUNCE * 1000)
+    parser.add_argument('--max-batch-size', type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument('--batch-sizes', type=parse_ints, default=BATCH_SIZES)
+    parser.add_argument('--seq-lengths', type=parse_ints, default=SEQ_LENGTHS)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--no-prefilter', action='store_true')
+    parser.add_argument('--skip-scan', action='store_true')
+    parser.add_argument('--skip-throughput', action='store_true')
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    args = parser.parse_args(argv)
+
+    conversations = load_conversations(args.datasets)
+    if args.dialogs:
+        conversations = [conversations[i % len(conversations)] for i in range(args.dialogs)]
+
+    started = time.perf_counter()
+    tokenizer, classifier = load_model(args.model_path, backend=args.backend)
+    prefilter = None if args.no_prefilter else load_prefilter(args.model_path)
+    report = {
+        'revision': git_revision(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'backend': type(classifier).name,
+        'prefilter_threshold': prefilter.threshold if prefilter else None,
+        'cpu_count': os.cpu_count(),
+        'model_load_seconds': time.perf_counter() - started,
+    }
+    if not args.skip_scan:
+        with tempfile.TemporaryDirectory() as workdir:
+            report['full_scan'] = bench_scan(args, conversations, tokenizer, classifier, prefilter, workdir)
+    if not args.skip_throughput:
+        report['throughput'] = bench_throughput(classifier, tokenizer, args.batch_sizes, args.seq_lengths,
+                                                args.repeats)
+    report['peak_rss_mb'] = peak_rss_mb()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f'벤치마크 결과 저장: {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
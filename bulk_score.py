@@ -0,0 +1,243 @@
+import io
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import itertools
+import multiprocessing
+from collections import deque
+
+from inference import (build_windows, aggregate_scores, split_messages, label_for, MAX_LENGTH, MAX_BATCH_SIZE,
+                       WINDOW_OVERLAP, AGGREGATE, LAST_K)
+
+CHUNK_SIZE = 256
+TEXT_COLUMN = 'text'
+CHECKPOINT_SUFFIX = '.progress'
+SERVER_RETRIES = 600
+
+_tokenizer = None
+_classifier = None
+_prefilter = None
+_options = {}
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def read_rows(path, fmt, text_column=TEXT_COLUMN, id_column=None):
+    # 파일 전체를 메모리에 올리지 않고 한 행씩 읽음
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if fmt == 'csv':
+            csv.field_size_limit(sys.maxsize)
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for number, row in enumerate(rows):
+            yield (row.get(id_column) if id_column else number), row.get(text_column) or ''
+
+
+def init_worker(model_path, backend, threads, batch_size, aggregate, last_k, overlap, prefilter_threshold):
+    global _tokenizer, _classifier, _prefilter
+    from model_loader import load_model
+    from prefilter import load_prefilter
+    _tokenizer, _classifier = load_model(model_path, backend=backend, threads=threads)
+    if prefilter_threshold is not False:
+        _prefilter = load_prefilter(model_path, prefilter_threshold)
+    _options.update(batch_size=batch_size, aggregate=aggregate, last_k=last_k, overlap=overlap)
+
+
+def score_chunk(texts):
+    scores = [None] * len(texts)
+    if _prefilter is not None:
+        for i, prob in enumerate(_prefilter.score_many(texts)):
+            if _prefilter.is_benign(prob):
+                scores[i] = prob
+    pending = [i for i, score in enumerate(scores) if score is None]
+    for i, score in zip(pending, score_conversations([texts[i] for i in pending])):
+        scores[i] = score
+    return scores
+
+
+def score_conversations(texts):
+    conversations = [split_messages(text) for text in texts]
+    messages = [message for conversation in conversations for message in conversation]
+    token_lists = _tokenizer(messages, add_special_tokens=False)['input_ids'] if messages else []
+
+    windows, owners = [], []
+    offset = 0
+    for index, conversation in enumerate(conversations):
+        for window in build_windows(token_lists[offset:offset + len(conversation)], _tokenizer.cls_token_id,
+                                    _tokenizer.sep_token_id, MAX_LENGTH, _options['overlap']):
+            windows.append(window)
+            owners.append(index)
+        offset += len(conversation)
+
+    # 길이가 비슷한 윈도우끼리 묶어 패딩 낭비를 줄임
+    order = sorted(range(len(windows)), key=lambda i: len(windows[i]))
+    probs = [0.0] * len(windows)
+    batch_size = _options['batch_size']
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        for i, prob in zip(batch, _classifier.predict([windows[i] for i in batch])):
+            probs[i] = prob
+
+    per_conversation = [[] for _ in conversations]
+    for i, owner in enumerate(owners):
+        per_conversation[owner].append(probs[i])
+    return [aggregate_scores(p, _options['aggregate'], _options['last_k']) for p in per_conversation]
+
+
+class ResultWriter:
+    def __init__(self, path, fmt, offset):
+        self.fmt = fmt
+        self.f = open(path, 'a+b' if offset else 'wb')
+        # 중단 시점 이후에 쓰다 만 내용은 잘라냄
+        self.f.truncate(offset)
+        self.f.seek(offset)
+        if fmt == 'csv' and not offset:
+            self._write_csv(['id', 'score', 'label'])
+
+    def _write_csv(self, *rows):
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerows(rows)
+        self.f.write(buffer.getvalue().encode('utf-8'))
+
+    def write(self, ids, scores):
+        if self.fmt == 'csv':
+            self._write_csv(*([row_id, f'{score:.6f}', label_for(score)] for row_id, score in zip(ids, scores)))
+        else:
+            for row_id, score in zip(ids, scores):
+                entry = {'id': row_id, 'score': round(score, 6), 'label': label_for(score)}
+                self.f.write((json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8'))
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        return self.f.tell()
+
+    def close(self):
+        self.f.close()
+
+
+def load_checkpoint(path, input_path):
+    if not os.path.exists(path):
+        return {'rows': 0, 'offset': 0}
+    with open(path, 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('input') != os.path.abspath(input_path):
+        raise ValueError(f'{path}는 다른 입력 파일의 진행 기록입니다: {checkpoint.get("input")}')
+    return checkpoint
+
+
+def save_checkpoint(path, input_path, rows, offset):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'input': os.path.abspath(input_path), 'rows': rows, 'offset': offset}, f)
+    os.replace(tmp, path)
+
+
+def chunked(rows, size):
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run(args):
+    in_format = detect_format(args.input, args.input_format)
+    out_format = detect_format(args.output, args.output_format)
+    checkpoint_path = args.output + CHECKPOINT_SUFFIX
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    checkpoint = load_checkpoint(checkpoint_path, args.input)
+    done = checkpoint['rows']
+    if done:
+        print(f'이어서 처리: {done}행 이후부터', file=sys.stderr)
+
+    rows = itertools.islice(read_rows(args.input, in_format, args.text_column, args.id_column), done, None)
+    writer = ResultWriter(args.output, out_format, checkpoint['offset'])
+    threads = args.threads or max(1, (os.cpu_count() or 1) // args.workers)
+    prefilter_threshold = False if args.no_prefilter else args.prefilter_threshold
+    initargs = (args.model_path, args.backend, threads, args.batch_size, args.aggregate, args.last_k, args.overlap,
+                prefilter_threshold)
+    if args.server:
+        # 채점 서버가 모델을 들고 있으므로 워커는 요청만 보내는 스레드로 충분
+        from multiprocessing.pool import ThreadPool
+        from scoring_server import ScoringClient
+        # 서버가 과부하로 거절하면 Retry-After만큼 기다렸다가 계속 보냄
+        client = ScoringClient(args.server, retries=SERVER_RETRIES)
+        pool, score_fn = ThreadPool(args.workers), client.score_many
+    else:
+        pool, score_fn = multiprocessing.get_context('spawn').Pool(args.workers, init_worker, initargs), score_chunk
+    # 처리 중인 청크 수를 제한해 입력 크기와 무관하게 메모리 사용량을 일정하게 유지
+    pending = deque()
+    max_pending = args.workers * 2
+    started = time.perf_counter()
+    scored = 0
+
+    def drain_one():
+        nonlocal done, scored
+        ids, result = pending.popleft()
+        offset = writer.write(ids, result.get())
+        done += len(ids)
+        scored += len(ids)
+        save_checkpoint(checkpoint_path, args.input, done, offset)
+        elapsed = time.perf_counter() - started
+        print(f'\r{done}행 완료 ({scored / elapsed:.1f}행/초)', end='', file=sys.stderr, flush=True)
+
+    try:
+        for chunk in chunked(rows, args.chunk_size):
+            ids = [row_id for row_id, _ in chunk]
+            pending.append((ids, pool.apply_async(score_fn, ([text for _, text in chunk],))))
+            while len(pending) >= max_pending:
+                drain_one()
+        while pending:
+            drain_one()
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+        writer.close()
+    print(file=sys.stderr)
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    print(f'채점 완료: {done}행 → {args.output}', file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    from model_loader import MODEL_PATH, BACKEND
+    parser = argparse.ArgumentParser(description='2Racker 대화 데이터 대량 채점 (CSV/JSONL 스트리밍, 중단 후 재개 지원)')
+    parser.add_argument('input')
+    parser.add_argument('output')
+    parser.add_argument('--input-format', choices=['csv', 'jsonl'])
+    parser.add_argument('--output-format', choices=['csv', 'jsonl'])
+    parser.add_argument('--text-column', default=TEXT_COLUMN)
+    parser.add_argument('--id-column', default=None, help='지정하지 않으면 입력 행 번호를 id로 사용')
+    parser.add_argument('--model-path', default=MODEL_PATH)
+    parser.add_argument('--backend', default=os.getenv('model_backend', BACKEND))
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    parser.add_argument('--threads', type=int, default=0, help='워커당 torch 스레드 수 (0이면 자동)')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--batch-size', type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument('--aggregate', choices=['max', 'mean', 'last_k'], default=AGGREGATE)
+    parser.add_argument('--last-k', type=int, default=LAST_K)
+    parser.add_argument('--overlap', type=int, default=WINDOW_OVERLAP)
+    parser.add_argument('--prefilter-threshold', type=float, default=None,
+                        help='전 단계 필터 임계값 (기본값: prefilter_report.json의 권장값)')
+    parser.add_argument('--no-prefilter', action='store_true')
+    parser.add_argument('--server', default=os.getenv('scoring_url'),
+                        help='채점 서버 주소 (예: http://127.0.0.1:8765). 지정하면 모델을 직접 올리지 않음')
+    parser.add_argument('--restart', action='store_true', help='진행 기록을 무시하고 처음부터 다시 채점')
+    args = parser.parse_args(argv)
+    return run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import os
+import json
+import time
+import threading
+
+from telethon import events, types
+
+DIALOG_INDEX_FILE = 'dialog_index.json'
+FULL_REFRESH_INTERVAL = 60 * 60
+
+
+class DialogEntry:
+    def __init__(self, peer_id, name, is_user, top_message_id=0, entity=None):
+        self.id = peer_id
+        self.name = name
+        self.is_user = is_user
+        self.top_message_id = top_message_id
+        self.event_message_id = 0
+        # 재시작 직후에는 세션에 캐시된 엔티티를 peer ID로 조회
+        self.entity = entity if entity is not None else peer_id
+
+    @property
+    def latest_message_id(self):
+        return max(self.top_message_id, self.event_message_id)
+
+    def to_dict(self):
+        return {'name': self.name, 'is_user': self.is_user, 'top_message_id': self.top_message_id}
+
+
+class DialogIndex:
+    def __init__(self, path=DIALOG_INDEX_FILE):
+        self.path = path
+        # 목록은 Qt 스레드에서도 읽으므로 Telethon 스레드의 갱신과 겹치지 않게 함
+        self._lock = threading.Lock()
+        self.entries = self._load()
+        self.last_full_refresh = time.monotonic() if self.entries else 0
+
+    def _load(self):
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return {
+                    int(k): DialogEntry(int(k), v['name'], v['is_user'], v.get('top_message_id', 0))
+                    for k, v in json.load(f).items()
+                }
+        return {}
+
+    def save(self):
+        with self._lock:
+            data = {str(k): e.to_dict() for k, e in self.entries.items()}
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+    def get(self, peer_id):
+        return self.entries.get(peer_id)
+
+    def users(self):
+        with self._lock:
+            entries = [e for e in self.entries.values() if e.is_user]
+        return sorted(entries, key=lambda e: e.latest_message_id, reverse=True)
+
+    async def refresh(self, client, full=False):
+        full = full or not self.entries or time.monotonic() - self.last_full_refresh > FULL_REFRESH_INTERVAL
+        seen = {}
+        async for dialog in client.iter_dialogs():
+            top_message_id = dialog.message.id if dialog.message else 0
+            entry = self.entries.get(dialog.id)
+            # 대화 목록은 최근 메시지 순이므로 변경 없는 대화를 만나면 이후도 변경 없음
+            if (not full and not dialog.pinned and entry is not None
+                    and entry.top_message_id == top_message_id and entry.name == dialog.name):
+                entry.entity = dialog.input_entity
+                break
+            seen[dialog.id] = DialogEntry(dialog.id, dialog.name, dialog.is_user, top_message_id, dialog.input_entity)
+        with self._lock:
+            if full:
+                self.entries = seen
+                self.last_full_refresh = time.monotonic()
+            else:
+                self.entries.update(seen)
+        self.save()
+
+    def attach(self, client):
+        client.add_event_handler(self._on_new_message, events.NewMessage())
+        client.add_event_handler(self._on_user_name, events.Raw(types.UpdateUserName))
+
+    async def _on_new_message(self, event):
+        entry = self.entries.get(event.chat_id)
+        if entry is not None:
+            entry.event_message_id = max(entry.event_message_id, event.message.id)
+
+    async def _on_user_name(self, update):
+        entry = self.entries.get(update.user_id)
+        if entry is not None:
+            entry.name = ' '.join(filter(None, (update.first_name, update.last_name)))
@@ -0,0 +1,206 @@
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from transformers import (AutoConfig, AutoTokenizer, AutoModelForSequenceClassification,
+                          get_linear_schedule_with_warmup)
+
+from evaluation import load_holdout, score_metrics, has_text, DATASET_PATH, SEED
+from model_loader import load_backend, score_texts, MODEL_PATH
+from train import load_tokenized, bucket_batches, collate, evaluate, CACHE_DIR, MAX_LENGTH, BATCH_SIZE
+
+STUDENT_PATH = './koelectra-romance-scam-student'
+STUDENT_LAYERS = 4
+STUDENT_HIDDEN = 256
+STUDENT_HEADS = 4
+TEMPERATURE = 2.0
+ALPHA = 0.7
+EPOCHS = 5
+LEARNING_RATE = 1e-4
+TEACHER_BATCH_SIZE = 32
+
+logger = logging.getLogger('2racker.distill')
+
+
+def build_student(teacher_path, init=None, layers=STUDENT_LAYERS, hidden=STUDENT_HIDDEN, heads=STUDENT_HEADS):
+    if init:
+        return AutoModelForSequenceClassification.from_pretrained(init, num_labels=2)
+    # 교사와 같은 어휘·토크나이저를 쓰되 층 수와 hidden 크기만 줄인 구조
+    config = AutoConfig.from_pretrained(teacher_path)
+    config.num_hidden_layers = layers
+    config.hidden_size = hidden
+    config.num_attention_heads = heads
+    config.intermediate_size = hidden * 4
+    if hasattr(config, 'embedding_size'):
+        config.embedding_size = min(config.embedding_size, hidden)
+    config.num_labels = 2
+    return AutoModelForSequenceClassification.from_config(config)
+
+
+def load_unlabeled(paths, tokenizer, max_length):
+    from datasets import load_dataset, concatenate_datasets
+    parts = []
+    for path in paths:
+        kind = 'parquet' if path.endswith('.parquet') else 'json' if path.endswith(('.jsonl', '.json')) else 'csv'
+        data = load_dataset(kind, data_files=path)['train']
+        data = data.filter(has_text)
+
+        def tokenize_fn(batch):
+            encoded = tokenizer(batch['text'], truncation=True, max_length=max_length)
+            encoded['length'] = [len(ids) for ids in encoded['input_ids']]
+            encoded['label'] = [-1] * len(batch['text'])
+            return encoded
+
+        parts.append(data.map(tokenize_fn, batched=True, remove_columns=data.column_names))
+    return concatenate_datasets(parts) if parts else None
+
+
+def teacher_logits(teacher, dataset, pad_id, batch_size=TEACHER_BATCH_SIZE):
+    # 교사 출력은 한 번만 계산해 두고 에폭마다 재사용
+    teacher.eval()
+    order = sorted(range(len(dataset)), key=lambda i: dataset[i]['length'])
+    logits = np.zeros((len(dataset), 2), dtype=np.float32)
+    with torch.no_grad():
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            input_ids, attention_mask, _ = collate(dataset, indices, pad_id)
+            logits[indices] = teacher(input_ids=input_ids, attention_mask=attention_mask).logits.numpy()
+    return logits
+
+
+def distillation_loss(student_logits, teacher_logits, labels, temperature, alpha):
+    soft = F.kl_div(F.log_softmax(student_logits / temperature, dim=1), F.softmax(teacher_logits / temperature, dim=1),
+                    reduction='batchmean') * temperature ** 2
+    labelled = labels >= 0
+    if not labelled.any():
+        return soft
+    hard = F.cross_entropy(student_logits[labelled], labels[labelled])
+    return alpha * soft + (1 - alpha) * hard
+
+
+def distill(args):
+    random.seed(args.seed)
+    torch.manual_seed(args.seed)
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    tokenizer = AutoTokenizer.from_pretrained(args.teacher)
+    pad_id = tokenizer.pad_token_id or 0
+    data = load_tokenized(args.dataset, tokenizer, args.max_length, args.cache_dir)
+    train_set, test_set = data['train'], data['test']
+    unlabeled = load_unlabeled(args.unlabeled, tokenizer, args.max_length)
+    if unlabeled is not None:
+        from datasets import concatenate_datasets
+        train_set = concatenate_datasets([train_set, unlabeled.cast(train_set.features)])
+
+    teacher = AutoModelForSequenceClassification.from_pretrained(args.teacher)
+    started = time.perf_counter()
+    targets = torch.from_numpy(teacher_logits(teacher, train_set, pad_id))
+    logger.info('교사 출력 계산: %d건, %.1fs', len(train_set), time.perf_counter() - started)
+    del teacher
+
+    student = build_student(args.teacher, args.student_init, args.layers, args.hidden, args.heads)
+    student.train()
+    lengths = train_set['length']
+    total_steps = len(bucket_batches(lengths, args.batch_size, args.seed, 0)) * args.epochs
+    optimizer = torch.optim.AdamW(student.parameters(), lr=args.lr)
+    scheduler = get_linear_schedule_with_warmup(optimizer, int(total_steps * 0.06), total_steps)
+
+    history = []
+    started = time.perf_counter()
+    for epoch in range(args.epochs):
+        running = 0.0
+        batches = bucket_batches(lengths, args.batch_size, args.seed, epoch)
+        for indices in batches:
+            input_ids, attention_mask, labels = collate(train_set, indices, pad_id)
+            logits = student(input_ids=input_ids, attention_mask=attention_mask).logits
+            loss = distillation_loss(logits, targets[indices], labels, args.temperature, args.alpha)
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(student.parameters(), 1.0)
+            optimizer.step()
+            scheduler.step()
+            optimizer.zero_grad()
+            running += loss.item()
+        metrics, _, _ = evaluate(student, test_set, pad_id, args.batch_size)
+        history.append({'epoch': epoch + 1, 'train_loss': running / len(batches), **metrics})
+        logger.info('epoch %d: %s', epoch + 1, json.dumps(history[-1]))
+
+    student.save_pretrained(args.output)
+    tokenizer.save_pretrained(args.output)
+    return history, time.perf_counter() - started
+
+
+def directory_size_mb(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names
+               if name.endswith(('.safetensors', '.bin'))) / 1024 / 1024
+
+
+def compare(teacher_path, student_path, dataset_path):
+    texts, labels = load_holdout(dataset_path)
+    tokenizer = AutoTokenizer.from_pretrained(teacher_path)
+    pad_id = tokenizer.pad_token_id or 0
+    results, reference = {}, None
+    for name, path in (('teacher', teacher_path), ('student', student_path)):
+        classifier = load_backend('torch', path, pad_id)
+        score_texts(classifier, tokenizer, texts[:8])
+        probs, elapsed = score_texts(classifier, tokenizer, texts)
+        single = time.perf_counter()
+        for text in texts[:32]:
+            classifier.predict([tokenizer(text, truncation=True, max_length=MAX_LENGTH)['input_ids']])
+        single = (time.perf_counter() - single) * 1000 / min(32, len(texts))
+        preds = [1 if p > 0.5 else 0 for p in probs]
+        reference = reference or preds
+        results[name] = {
+            'parameters': sum(p.numel() for p in classifier.model.parameters()),
+            'size_mb': directory_size_mb(path),
+            'ms_per_sample_batched': elapsed * 1000 / len(texts),
+            'ms_per_sample_single': single,
+            'agreement_with_teacher': sum(a == b for a, b in zip(preds, reference)) / len(preds),
+            'metrics': score_metrics(labels, preds),
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='2Racker 지식 증류: 학습된 모델을 교사로 경량 학생 모델 학습')
+    parser.add_argument('--teacher', default=MODEL_PATH)
+    parser.add_argument('--output', default=STUDENT_PATH)
+    parser.add_argument('--dataset', default=DATASET_PATH)
+    parser.add_argument('--unlabeled', nargs='*', default=[], help='text 열만 있는 추가 대화 데이터 (csv/jsonl/parquet)')
+    parser.add_argument('--student-init', default=None, help='사전학습된 소형 모델에서 시작 (예: monologg/koelectra-small-v3-discriminator)')
+    parser.add_argument('--layers', type=int, default=STUDENT_LAYERS)
+    parser.add_argument('--hidden', type=int, default=STUDENT_HIDDEN)
+    parser.add_argument('--heads', type=int, default=STUDENT_HEADS)
+    parser.add_argument('--temperature', type=float, default=TEMPERATURE)
+    parser.add_argument('--alpha', type=float, default=ALPHA, help='교사 분포 손실 비중 (나머지는 정답 라벨 손실)')
+    parser.add_argument('--epochs', type=int, default=EPOCHS)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--lr', type=float, default=LEARNING_RATE)
+    parser.add_argument('--max-length', type=int, default=MAX_LENGTH)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--threads', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=SEED)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+
+    history, seconds = distill(args)
+    report = {'teacher': args.teacher, 'history': history, 'train_seconds': seconds,
+              'comparison': compare(args.teacher, args.output, args.dataset)}
+    with open(os.path.join(args.output, 'distill_report.json'), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    for name, result in report['comparison'].items():
+        print(f"{name:8s} {result['parameters'] / 1e6:7.1f}M params {result['size_mb']:7.1f}MB "
+              f"{result['ms_per_sample_single']:7.2f}ms/건 f1={result['metrics']['f1']:.4f} "
+              f"일치율={result['agreement_with_teacher']:.4f}")
+    print(f'학생 모델 저장: {args.output} (model_path 환경변수 또는 --model-path 로 교체 사용)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,32 @@
+import numpy as np
+from sklearn.metrics import precision_recall_fscore_support, accuracy_score
+
+DATASET_PATH = 'final_set.csv'
+TEST_SIZE = 0.2
+SEED = 42
+
+
+def has_text(row):
+    # 전처리 결과에는 빈 대화 행이 있음 (토크나이저는 None·빈 문자열을 받지 못함)
+    return isinstance(row['text'], str) and bool(row['text'].strip())
+
+
+def load_splits(path=DATASET_PATH):
+    from datasets import load_dataset
+    dataset = load_dataset('parquet' if path.endswith('.parquet') else 'csv', data_files=path)
+    return dataset['train'].filter(has_text).train_test_split(test_size=TEST_SIZE, seed=SEED)
+
+
+def load_holdout(path=DATASET_PATH):
+    test = load_splits(path)['test']
+    return list(test['text']), list(test['label'])
+
+
+def score_metrics(labels, preds):
+    precision, recall, f1, _ = precision_recall_fscore_support(labels, preds, average='binary', zero_division=0)
+    acc = accuracy_score(labels, preds)
+    return {'accuracy': acc, 'f1': f1, 'precision': precision, 'recall': recall}
+
+
+def compute_metrics(pred):
+    return score_metrics(pred.label_ids, np.argmax(pred.predictions, axis=1))
@@ -0,0 +1,165 @@
+import csv
+import time
+import random
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta
+
+from telethon import events, errors
+
+from inference import split_messages
+
+DIALOG_PAGE_SIZE = 100
+MESSAGE_PAGE_SIZE = 100
+
+
+def load_conversations(paths):
+    conversations = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                messages = split_messages(row.get('text'))
+                if messages:
+                    conversations.append(messages)
+    return conversations
+
+
+class FakeUser:
+    def __init__(self, user_id, first_name):
+        self.id = user_id
+        self.first_name = first_name
+        self.last_name = None
+        self.username = f'user{user_id}'
+        self.phone = None
+
+
+class FakeMessage:
+    def __init__(self, message_id, chat_id, text, date):
+        self.id = message_id
+        self.chat_id = chat_id
+        self.text = text
+        self.message = text
+        self.date = date
+
+
+class FakeDialog:
+    def __init__(self, user, messages):
+        self.id = user.id
+        self.entity = user
+        self.input_entity = user.id
+        self.name = self.title = user.first_name
+        self.is_user = True
+        self.is_group = False
+        self.is_channel = False
+        self.pinned = False
+        self.messages = messages
+
+    @property
+    def message(self):
+        return self.messages[-1] if self.messages else None
+
+
+class FakeNewMessageEvent:
+    def __init__(self, message):
+        self.message = message
+        self.chat_id = message.chat_id
+        self.raw_text = message.text
+        self.is_private = True
+
+
+class FakeTelegramClient:
+    def __init__(self, conversations, latency=0.0, jitter=0.0, seed=0, flood_rate=None, flood_wait=1):
+        self.latency = latency
+        self.jitter = jitter
+        self.flood_rate = flood_rate
+        self.flood_wait = flood_wait
+        self.recent = deque()
+        self.flood_waits = 0
+        self.random = random.Random(seed)
+        self.connected = False
+        self.handlers = []
+        self.requests = 0
+        self.next_message_id = 1
+        self.clock = datetime(2025, 1, 1)
+        self.me = FakeUser(1, '나')
+        self.dialogs = {}
+        for index, messages in enumerate(conversations):
+            user = FakeUser(1000 + index, f'대화상대{index}')
+            dialog = FakeDialog(user, [])
+            self.dialogs[user.id] = dialog
+            for text in messages:
+                dialog.messages.append(self._new_message(user.id, text))
+
+    def _new_message(self, chat_id, text):
+        message = FakeMessage(self.next_message_id, chat_id, text, self.clock)
+        self.next_message_id += 1
+        self.clock += timedelta(seconds=1)
+        return message
+
+    async def _round_trip(self):
+        self.requests += 1
+        if self.flood_rate:
+            # 최근 1초 동안의 요청 수가 flood_rate를 넘으면 Telegram처럼 FloodWait 응답
+            now = time.monotonic()
+            while self.recent and now - self.recent[0] > 1:
+                self.recent.popleft()
+            if len(self.recent) >= self.flood_rate:
+                self.flood_waits += 1
+                raise errors.FloodWaitError(request=None, capture=self.flood_wait)
+            self.recent.append(now)
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def is_connected(self):
+        return self.connected
+
+    async def connect(self):
+        await self._round_trip()
+        self.connected = True
+
+    async def disconnect(self):
+        self.connected = False
+
+    async def is_user_authorized(self):
+        return True
+
+    async def get_me(self):
+        await self._round_trip()
+        return self.me
+
+    def add_event_handler(self, callback, event=None):
+        self.handlers.append((callback, event))
+
+    async def iter_dialogs(self, limit=None):
+        dialogs = sorted(self.dialogs.values(), key=lambda d: d.message.id if d.message else 0, reverse=True)
+        if limit is not None:
+            dialogs = dialogs[:limit]
+        for start in range(0, len(dialogs), DIALOG_PAGE_SIZE):
+            await self._round_trip()
+            for dialog in dialogs[start:start + DIALOG_PAGE_SIZE]:
+                yield dialog
+
+    async def get_dialogs(self, limit=None):
+        return [dialog async for dialog in self.iter_dialogs(limit)]
+
+    async def iter_messages(self, entity, limit=None, min_id=0, **kwargs):
+        peer_id = entity if isinstance(entity, int) else entity.id
+        messages = [m for m in reversed(self.dialogs[peer_id].messages) if m.id > min_id]
+        if limit is not None:
+            messages = messages[:limit]
+        if not messages:
+            await self._round_trip()
+        for start in range(0, len(messages), MESSAGE_PAGE_SIZE):
+            await self._round_trip()
+            for message in messages[start:start + MESSAGE_PAGE_SIZE]:
+                yield message
+
+    async def inject_message(self, peer_id, text):
+        message = self._new_message(peer_id, text)
+        self.dialogs[peer_id].messages.append(message)
+        event = FakeNewMessageEvent(message)
+        for callback, builder in self.handlers:
+            if builder is None or isinstance(builder, events.NewMessage):
+                await callback(event)
+        return message
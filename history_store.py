@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime
+
+HISTORY_DB = 'scan_history.db'
+PAGE_SIZE = 100
+RETENTION_DAYS = 30
+MAX_ROWS = 100000
+COMPACT_THRESHOLD = 1000
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS scan_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id INTEGER,
+    user TEXT NOT NULL,
+    result TEXT NOT NULL,
+    score REAL,
+    time TEXT NOT NULL,
+    ts REAL NOT NULL,
+    indicators TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_scan_log_chat ON scan_log (chat_id, ts);
+CREATE INDEX IF NOT EXISTS idx_scan_log_result ON scan_log (result, ts);
+CREATE INDEX IF NOT EXISTS idx_scan_log_ts ON scan_log (ts);
+'''
+
+COLUMNS = ('id', 'chat_id', 'user', 'result', 'score', 'time', 'ts', 'indicators')
+INSERT = 'INSERT INTO scan_log (chat_id, user, result, score, time, ts, indicators) VALUES (?, ?, ?, ?, ?, ?, ?)'
+
+
+class HistoryStore:
+    def __init__(self, path=HISTORY_DB, legacy_log=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        # 지표 열이 없던 이전 버전 DB
+        if 'indicators' not in {row[1] for row in self.conn.execute('PRAGMA table_info(scan_log)')}:
+            self.conn.execute('ALTER TABLE scan_log ADD COLUMN indicators TEXT')
+        if legacy_log and os.path.exists(legacy_log):
+            self._import_legacy(legacy_log)
+
+    def _import_legacy(self, legacy_log):
+        with open(legacy_log, 'r', encoding='utf-8') as f:
+            logs = json.load(f)
+        # 기존 scan_log.json은 최신 항목이 앞에 있으므로 역순으로 추가
+        self.append_many(reversed(logs))
+        os.remove(legacy_log)
+
+    def _row(self, entry):
+        stamp = entry.get('time') or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            ts = datetime.strptime(stamp, '%Y-%m-%d %H:%M:%S').timestamp()
+        except ValueError:
+            ts = time.time()
+        indicators = entry.get('indicators')
+        return (entry.get('chat_id'), entry['user'], entry['result'], entry.get('score'), stamp, ts,
+                json.dumps(indicators, ensure_ascii=False) if indicators else None)
+
+    def append(self, entry):
+        with self._lock, self.conn:
+            return self.conn.execute(INSERT, self._row(entry)).lastrowid
+
+    def append_many(self, entries):
+        rows = [self._row(entry) for entry in entries]
+        with self._lock, self.conn:
+            self.conn.executemany(INSERT, rows)
+
+    def _where(self, chat_id=None, result=None, since=None, until=None, before_id=None):
+        clauses, params = [], []
+        if chat_id is not None:
+            clauses.append('chat_id = ?')
+            params.append(chat_id)
+        if result is not None:
+            clauses.append('result = ?')
+            params.append(result)
+        if since is not None:
+            clauses.append('ts >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('ts < ?')
+            params.append(until)
+        if before_id is not None:
+            clauses.append('id < ?')
+            params.append(before_id)
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def query(self, chat_id=None, result=None, since=None, until=None, before_id=None, limit=PAGE_SIZE):
+        where, params = self._where(chat_id, result, since, until, before_id)
+        with self._lock:
+            rows = self.conn.execute(
+                f'SELECT {", ".join(COLUMNS)} FROM scan_log{where} ORDER BY id DESC LIMIT ?', params + [limit]
+            ).fetchall()
+        logs = [dict(zip(COLUMNS, row)) for row in rows]
+        for log in logs:
+            log['indicators'] = json.loads(log['indicators']) if log['indicators'] else []
+        return logs
+
+    def count(self, chat_id=None, result=None, since=None, until=None):
+        where, params = self._where(chat_id, result, since, until)
+        with self._lock:
+            return self.conn.execute(f'SELECT COUNT(*) FROM scan_log{where}', params).fetchone()[0]
+
+    def apply_retention(self, max_age_days=RETENTION_DAYS, max_rows=MAX_ROWS):
+        with self._lock, self.conn:
+            deleted = 0
+            if max_age_days:
+                cutoff = time.time() - max_age_days * 24 * 60 * 60
+                deleted += self.conn.execute('DELETE FROM scan_log WHERE ts < ?', (cutoff,)).rowcount
+            if max_rows:
+                deleted += self.conn.execute(
+                    'DELETE FROM scan_log WHERE id <= (SELECT id FROM scan_log ORDER BY id DESC LIMIT 1 OFFSET ?)',
+                    (max_rows,)
+                ).rowcount
+        if deleted >= COMPACT_THRESHOLD:
+            self.compact()
+        return deleted
+
+    def compact(self):
+        with self._lock:
+            self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            self.conn.execute('VACUUM')
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
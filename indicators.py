@@ -0,0 +1,287 @@
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from collections import deque
+
+INDICATOR_FILE = 'scam_indicators.jsonl'
+STRONG_INDICATOR = 0.9
+RELOAD_INTERVAL = 5
+INDICATOR_TYPES = ('domain', 'keyword', 'regex')
+
+# 계좌번호는 은행 관련 단어가 앞뒤 세 어절 안에 있을 때만 인정 (날짜·전화번호 오탐 방지)
+BANK_WORDS = ('은행|계좌|입금|예금주|송금|이체|국민|신한|농협|우체국|새마을|수협|신협|카카오뱅크|카뱅|케이뱅크|토스뱅크|'
+              'KB|NH|IBK|SC제일|씨티')
+ACCOUNT_NUMBER = (r'(?<![\d-])'
+                  r'(?!\d{4}-\d{2}-\d{2}(?![\d-]))'     # 2024-01-15 같은 날짜
+                  r'(?!0\d{1,2}-\d{3,4}-\d{4}(?![\d-]))'  # 02-123-4567, 010-1234-5678 같은 전화번호
+                  r'\d{2,6}(?:-\d{2,6}){2,3}(?![\d-])')
+NEARBY = r'(?:[^\s\d]+\s+){0,3}'
+ACCOUNT_PATTERN = (rf'(?:{BANK_WORDS})[^\s\d]*\s*{NEARBY}{ACCOUNT_NUMBER}'
+                   rf'|{ACCOUNT_NUMBER}(?=\s*{NEARBY}[^\s\d]*(?:{BANK_WORDS}))')
+
+# 모델·데이터 폴더의 지표 파일과 함께 항상 쓰는 기본 지표 (set_original.csv의 스캠 대화에서 반복되는 항목)
+DEFAULT_INDICATORS = (
+    {'type': 'domain', 'pattern': 'bet.co', 'category': 'betting', 'weight': 0.95},
+    {'type': 'domain', 'pattern': 'z-mate.com', 'category': 'exchange', 'weight': 0.95},
+    {'type': 'regex', 'pattern': r'(?<![0-9A-Za-z])T[1-9A-HJ-NP-Za-km-z]{33}(?![0-9A-Za-z])', 'category': 'wallet',
+     'name': 'trc20', 'weight': 0.95},
+    {'type': 'regex', 'pattern': r'(?<![0-9A-Za-z])0x[0-9a-fA-F]{40}(?![0-9A-Za-z])', 'category': 'wallet',
+     'name': 'erc20', 'weight': 0.95},
+    {'type': 'regex', 'pattern': r'(?<![0-9A-Za-z])bc1[ac-hj-np-z02-9]{25,39}(?![0-9A-Za-z])', 'category': 'wallet',
+     'name': 'btc', 'weight': 0.95},
+    {'type': 'keyword', 'pattern': '가상계좌', 'category': 'account', 'weight': 0.7},
+    {'type': 'keyword', 'pattern': '계좌번호', 'category': 'account', 'weight': 0.5},
+    {'type': 'regex', 'pattern': ACCOUNT_PATTERN, 'category': 'account', 'name': 'bank_account', 'weight': 0.5},
+    {'type': 'keyword', 'pattern': 'usdt', 'category': 'crypto', 'weight': 0.5},
+    {'type': 'keyword', 'pattern': '업비트', 'category': 'crypto', 'weight': 0.4},
+    {'type': 'keyword', 'pattern': '바이낸스', 'category': 'crypto', 'weight': 0.4},
+    {'type': 'keyword', 'pattern': '빗썸', 'category': 'crypto', 'weight': 0.4},
+    {'type': 'keyword', 'pattern': '거래소', 'category': 'crypto', 'weight': 0.3},
+    {'type': 'keyword', 'pattern': '환전', 'category': 'crypto', 'weight': 0.3},
+    {'type': 'keyword', 'pattern': '출금', 'category': 'account', 'weight': 0.3},
+)
+
+logger = logging.getLogger('2racker.indicators')
+
+
+def indicator_id(indicator):
+    return f"{indicator['category']}:{indicator.get('name') or indicator['pattern']}"
+
+
+def normalize_keyword(text):
+    return ''.join(text.lower().split())
+
+
+class Automaton:
+    # 순수 파이썬 Aho-Corasick: pyahocorasick이 없을 때 사용
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+
+    def add_word(self, word, value):
+        node = 0
+        for ch in word:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = self.goto[node][ch] = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            node = nxt
+        self.out[node].append(value)
+
+    def make_automaton(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                fail = self.fail[node]
+                while fail and ch not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[nxt] = self.goto[fail].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def iter(self, text):
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for end, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for value in out[node]:
+                yield end, value
+
+
+def build_automaton(words):
+    if not words:
+        return None
+    try:
+        import ahocorasick
+        automaton = ahocorasick.Automaton()
+    except ImportError:
+        automaton = Automaton()
+    for word, value in words.items():
+        automaton.add_word(word, value)
+    automaton.make_automaton()
+    return automaton
+
+
+def is_domain_boundary(ch):
+    return not (ch.isascii() and (ch.isalnum() or ch in '-_'))
+
+
+class CompiledIndicators:
+    def __init__(self, indicators):
+        self.count = 0
+        self.invalid = []
+        domains, keywords, regexes = {}, {}, []
+        for indicator in indicators:
+            if not isinstance(indicator, dict):
+                self.invalid.append(indicator)
+                continue
+            kind, pattern = indicator.get('type'), str(indicator.get('pattern') or '')
+            try:
+                indicator = {'category': 'etc', **indicator, 'weight': float(indicator.get('weight', 0.5))}
+            except (TypeError, ValueError):
+                kind = None
+            if kind not in INDICATOR_TYPES or not pattern:
+                self.invalid.append(indicator)
+                continue
+            indicator['id'] = indicator_id(indicator)
+            if kind == 'domain':
+                domains.setdefault(pattern.lower(), []).append(indicator)
+            elif kind == 'keyword':
+                keywords.setdefault(normalize_keyword(pattern), []).append(indicator)
+            else:
+                # 합친 정규식 안에서 쓰일 모양 그대로 검사 ((?i) 같은 전역 플래그는 감싸면 오류)
+                try:
+                    re.compile(f'(?P<x>{pattern})')
+                except re.error as e:
+                    logger.warning('잘못된 정규식 지표 %r: %s', pattern, e)
+                    self.invalid.append(indicator)
+                    continue
+                regexes.append(indicator)
+            self.count += 1
+        # 문자열 지표는 Aho-Corasick 한 번, 정규식 지표는 하나로 합친 정규식 한 번으로 훑음
+        self.domains = build_automaton({word: (len(word), group) for word, group in domains.items()})
+        self.keywords = build_automaton({word: (len(word), group) for word, group in keywords.items()})
+        self.regexes = regexes
+        self.regex = None
+        self.separate = []
+        if regexes:
+            try:
+                self.regex = re.compile('|'.join(f'(?P<r{i}>{indicator["pattern"]})'
+                                                 for i, indicator in enumerate(regexes)), re.IGNORECASE)
+            except re.error as e:
+                # 지표끼리 그룹 이름이 겹치는 경우 등: 느리지만 하나씩 검사
+                logger.warning('정규식 지표를 하나로 합치지 못했습니다: %s', e)
+                self.separate = [(re.compile(indicator['pattern'], re.IGNORECASE), indicator) for indicator in regexes]
+
+    def scan(self, text, found):
+        lowered = text.lower()
+        if self.domains is not None:
+            for end, (length, group) in self.domains.iter(lowered):
+                start = end - length + 1
+                if (start == 0 or is_domain_boundary(lowered[start - 1])) and \
+                        (end + 1 == len(lowered) or is_domain_boundary(lowered[end + 1])):
+                    for indicator in group:
+                        found.setdefault(indicator['id'], (indicator, lowered[start:end + 1]))
+        if self.keywords is not None:
+            compact = normalize_keyword(text)
+            for end, (length, group) in self.keywords.iter(compact):
+                for indicator in group:
+                    found.setdefault(indicator['id'], (indicator, compact[end - length + 1:end + 1]))
+        if self.regex is not None:
+            for match in self.regex.finditer(text):
+                indicator = self.regexes[int(match.lastgroup[1:])]
+                found.setdefault(indicator['id'], (indicator, match.group()))
+        for regex, indicator in self.separate:
+            match = regex.search(text)
+            if match:
+                found.setdefault(indicator['id'], (indicator, match.group()))
+        return found
+
+
+def read_indicators(path):
+    indicators = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            try:
+                indicators.append(json.loads(line))
+            except ValueError as e:
+                logger.warning('%s:%d 읽기 실패: %s', path, number, e)
+    return indicators
+
+
+class IndicatorMatcher:
+    def __init__(self, path=INDICATOR_FILE, seed_path=None, defaults=DEFAULT_INDICATORS):
+        self.paths = [p for p in (seed_path, path) if p]
+        self.defaults = list(defaults)
+        self._lock = threading.Lock()
+        self._mtimes = None
+        self._checked = 0.0
+        self.compiled = None
+        try:
+            self.reload()
+        except Exception:
+            # 지표 파일이 잘못돼도 분석은 시작할 수 있도록 기본 지표만 사용 (파일이 바뀌면 다시 읽음)
+            logger.exception('지표 파일 읽기 실패, 기본 지표만 사용합니다')
+            self.compiled, self._mtimes, self._checked = CompiledIndicators(self.defaults), \
+                self._current_mtimes(), time.monotonic()
+
+    def _current_mtimes(self):
+        return tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in self.paths)
+
+    def reload(self):
+        mtimes = self._current_mtimes()
+        indicators = list(self.defaults)
+        for path in self.paths:
+            if os.path.exists(path):
+                indicators.extend(read_indicators(path))
+        compiled = CompiledIndicators(indicators)
+        with self._lock:
+            self.compiled, self._mtimes, self._checked = compiled, mtimes, time.monotonic()
+        logger.info('지표 %d개 로드 (오류 %d개)', compiled.count, len(compiled.invalid))
+        return compiled
+
+    def maybe_reload(self):
+        # 파일이 바뀌었는지는 RELOAD_INTERVAL마다 한 번만 확인
+        if time.monotonic() - self._checked < RELOAD_INTERVAL:
+            return self.compiled
+        self._checked = time.monotonic()
+        if self._current_mtimes() != self._mtimes:
+            try:
+                return self.reload()
+            except Exception:
+                logger.exception('지표 파일 다시 읽기 실패, 기존 지표를 계속 사용합니다')
+        return self.compiled
+
+    def match_many(self, texts):
+        compiled = self.maybe_reload()
+        found = {}
+        for text in texts:
+            if text:
+                compiled.scan(text, found)
+        hits = [{'id': key, 'category': indicator['category'], 'weight': indicator['weight'], 'match': matched}
+                for key, (indicator, matched) in found.items()]
+        return sorted(hits, key=lambda hit: -hit['weight'])
+
+    def match(self, text):
+        return self.match_many([text])
+
+    def __len__(self):
+        return self.compiled.count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='2Racker 스캠 지표(도메인·키워드·정규식) 매칭')
+    parser.add_argument('--indicators', default=INDICATOR_FILE)
+    sub = parser.add_subparsers(dest='command', required=True)
+    match_parser = sub.add_parser('match', help='문장에서 일치하는 지표 조회')
+    match_parser.add_argument('text')
+    sub.add_parser('check', help='지표 파일 검사')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+
+    matcher = IndicatorMatcher(args.indicators)
+    if args.command == 'check':
+        print(f'지표 {len(matcher)}개, 오류 {len(matcher.compiled.invalid)}개')
+        for indicator in matcher.compiled.invalid:
+            print(f'  오류: {json.dumps(indicator, ensure_ascii=False)}')
+        return 1 if matcher.compiled.invalid else 0
+    hits = matcher.match(args.text)
+    print(json.dumps(hits, ensure_ascii=False, indent=2) if hits else '일치하는 지표 없음')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,308 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import registry, BATCH_BUCKETS
+
+SCAM_LABEL = '로맨스 스캠'
+NORMAL_LABEL = '정상 대화'
+MAX_LENGTH = 512
+MAX_BATCH_SIZE = 16
+MAX_WAIT_MS = 20
+MAX_QUEUE = 256
+WINDOW_OVERLAP = 128
+AGGREGATE = 'max'
+LAST_K = 3
+MESSAGE_SEP = ' [SEP] '
+
+
+def label_for(prob):
+    return SCAM_LABEL if prob > 0.5 else NORMAL_LABEL
+
+
+def split_messages(text):
+    return [m.strip() for m in (text or '').split(MESSAGE_SEP) if m.strip()]
+
+
+def build_windows(token_lists, cls_id, sep_id, max_length=MAX_LENGTH, overlap=WINDOW_OVERLAP):
+    budget = max_length - 2
+    pieces = [ids[:budget] for ids in token_lists if ids]
+    windows = []
+    start = 0
+    while start < len(pieces):
+        end = start
+        used = 0
+        while end < len(pieces):
+            cost = len(pieces[end]) + (1 if end > start else 0)
+            if used + cost > budget:
+                break
+            used += cost
+            end += 1
+        window = [cls_id]
+        for i in range(start, end):
+            if i > start:
+                window.append(sep_id)
+            window.extend(pieces[i])
+        window.append(sep_id)
+        windows.append(window)
+        if end == len(pieces):
+            break
+        # 다음 윈도우는 직전 윈도우의 마지막 메시지들을 overlap 토큰만큼 다시 포함
+        next_start = end
+        tail = 0
+        while next_start - 1 > start and tail + len(pieces[next_start - 1]) + 1 <= overlap:
+            next_start -= 1
+            tail += len(pieces[next_start]) + 1
+        start = next_start
+    return windows
+
+
+def chain_future(source, target):
+    def copy(_):
+        if target.cancelled():
+            return
+        try:
+            target.set_result(source.result())
+        except Exception as e:
+            target.set_exception(e)
+
+    def cancel(_):
+        if target.cancelled():
+            source.cancel()
+
+    source.add_done_callback(copy)
+    target.add_done_callback(cancel)
+
+
+def done_future(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def aggregate_scores(probs, rule=AGGREGATE, last_k=LAST_K):
+    if not probs:
+        return 0.0
+    if rule == 'max':
+        return max(probs)
+    if rule == 'mean':
+        return sum(probs) / len(probs)
+    if rule == 'last_k':
+        tail = probs[-last_k:]
+        return sum(tail) / len(tail)
+    raise ValueError(f'unknown aggregate rule: {rule}')
+
+
+class InferenceEngine:
+    def __init__(self, loader, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS,
+                 aggregate=AGGREGATE, last_k=LAST_K, overlap=WINDOW_OVERLAP, start=True, prefilter_loader=None,
+                 max_queue=MAX_QUEUE):
+        self.loader = loader
+        self.prefilter_loader = prefilter_loader
+        self.tokenizer = None
+        self.model = None
+        self.prefilter = None
+        self.prefiltered = 0
+        self.forwarded = 0
+        self.load_error = None
+        self.ready = threading.Event()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.aggregate = aggregate
+        self.last_k = last_k
+        self.overlap = overlap
+        # 큐가 가득 차면 submit이 대기하므로 요청이 무한히 쌓이지 않음
+        self._queue = queue.Queue(max_queue)
+        registry.gauge('inference_queue_depth', self._queue.qsize)
+        self._deferred = []
+        self._ready_lock = threading.Lock()
+        # 여러 스레드에서 토큰화할 때 fast tokenizer의 잘림 설정이 서로 바뀌지 않도록 함
+        self._tokenizer_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='inference-engine', daemon=True)
+        if start:
+            self.start()
+
+    def start(self):
+        if not self._thread.is_alive():
+            self._thread.start()
+
+    def _when_ready(self, fn, *args):
+        # 모델 로딩이 끝나기 전의 요청은 보관했다가 로딩 직후 처리
+        with self._ready_lock:
+            if not self.ready.is_set():
+                future = Future()
+                self._deferred.append((fn, args, future))
+                return future
+        if self.load_error:
+            future = Future()
+            future.set_exception(self.load_error)
+            return future
+        return fn(*args)
+
+    def _load(self):
+        try:
+            self.tokenizer, self.model = self.loader()
+            if self.prefilter_loader:
+                self.prefilter = self.prefilter_loader()
+        except Exception as e:
+            self.load_error = e
+        with self._ready_lock:
+            self.ready.set()
+            deferred, self._deferred = self._deferred, []
+        if self.load_error:
+            for _, _, future in deferred:
+                if not future.cancelled():
+                    future.set_exception(self.load_error)
+        elif deferred:
+            # 큐가 가득 차면 넣는 쪽이 대기하므로 소비하는 추론 스레드가 직접 넣지 않음
+            threading.Thread(target=self._replay, args=(deferred,), name='inference-replay', daemon=True).start()
+
+    def _replay(self, deferred):
+        for fn, args, future in deferred:
+            if not future.cancelled():
+                chain_future(fn(*args), future)
+
+    def submit(self, text):
+        return self._when_ready(self._submit_text, text)
+
+    def _prefiltered(self, text):
+        # 전 단계 필터가 명백한 정상 대화로 본 경우 모델을 건너뛰고 필터 점수를 그대로 사용
+        if self.prefilter is None:
+            return None
+        prob = self.prefilter.score(text)
+        if not self.prefilter.is_benign(prob):
+            self.forwarded += 1
+            return None
+        self.prefiltered += 1
+        registry.inc('prefilter_skipped_total')
+        return prob
+
+    def _submit_text(self, text):
+        prob = self._prefiltered(text)
+        if prob is not None:
+            return done_future(prob)
+        started = time.perf_counter()
+        with self._tokenizer_lock:
+            input_ids = self.tokenizer(text, truncation=True, max_length=MAX_LENGTH)['input_ids']
+        registry.observe('scan_stage_seconds', time.perf_counter() - started, stage='tokenize')
+        return self.submit_ids(input_ids)
+
+    def submit_ids(self, input_ids):
+        future = Future()
+        self._queue.put((input_ids, future))
+        return future
+
+    def submit_conversation(self, messages):
+        return self._when_ready(self._submit_conversation, list(messages))
+
+    def prepare_conversation(self, messages):
+        # 토큰화와 전 단계 필터만 수행: (필터 점수, None) 또는 (None, 윈도우 목록)
+        # 모델 로딩을 기다리며 막히므로 이벤트 루프가 아닌 스레드에서 호출
+        self.ready.wait()
+        if self.load_error:
+            raise self.load_error
+        return self._prepare(list(messages))
+
+    def _prepare(self, messages):
+        prob = self._prefiltered(MESSAGE_SEP.join(messages))
+        if prob is not None:
+            return prob, None
+        started = time.perf_counter()
+        with self._tokenizer_lock:
+            token_lists = self.tokenizer(list(messages), add_special_tokens=False)['input_ids'] if messages else []
+        windows = build_windows(token_lists, self.tokenizer.cls_token_id, self.tokenizer.sep_token_id,
+                                MAX_LENGTH, self.overlap)
+        registry.observe('scan_stage_seconds', time.perf_counter() - started, stage='tokenize')
+        return None, windows
+
+    def _submit_conversation(self, messages):
+        prob, windows = self._prepare(messages)
+        if prob is not None:
+            return done_future(prob)
+        return self.submit_windows(windows)
+
+    def submit_windows(self, windows):
+        # 큐가 가득 차면 대기하므로 이벤트 루프가 아닌 스레드에서 호출
+        futures = [self.submit_ids(window) for window in windows]
+        result = Future()
+        if not futures:
+            result.set_result(0.0)
+            return result
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def on_done(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            if result.cancelled():
+                return
+            try:
+                probs = [future.result() for future in futures]
+                result.set_result(aggregate_scores(probs, self.aggregate, self.last_k))
+            except Exception as e:
+                result.set_exception(e)
+
+        def on_cancel(_):
+            # 대화 단위 요청이 취소되면 아직 처리되지 않은 윈도우도 모델에 넣지 않음
+            if result.cancelled():
+                for future in futures:
+                    future.cancel()
+
+        for future in futures:
+            future.add_done_callback(on_done)
+        result.add_done_callback(on_cancel)
+        return result
+
+    def predict(self, text):
+        return self.submit(text).result()
+
+    def predict_many(self, texts):
+        futures = [self.submit(text) for text in texts]
+        return [future.result() for future in futures]
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        self._load()
+        running = True
+        while running:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        batch = [(ids, future) for ids, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        started = time.perf_counter()
+        try:
+            probs = self.model.predict([ids for ids, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        registry.observe('scan_stage_seconds', time.perf_counter() - started, stage='forward')
+        registry.observe('inference_batch_size', len(batch), BATCH_BUCKETS)
+        registry.inc('inference_windows_total', len(batch))
+        for (_, future), prob in zip(batch, probs):
+            future.set_result(prob)
@@ -1,89 +1,148 @@
 import os
-import json
-from datetime import datetime
+import logging
+from timings import startup_timer
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QLabel, QPushButton, QListWidget,
     QListWidgetItem, QMessageBox, QSystemTrayIcon, QMenu, QAction,
     QTabWidget, QLineEdit, QSpinBox, QProgressBar, QTextEdit, QHBoxLayout,
-    QScrollArea
+    QScrollArea, QListView, QComboBox, QCheckBox
 )
 from PyQt5.QtGui import (
     QIcon, QPixmap, QPainter, QColor, QCursor, QGuiApplication, QFont
 )
-from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal
-from telethon.sync import TelegramClient
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
-import torch.nn.functional as F
+from PyQt5.QtCore import Qt, QTimer, QObject, QAbstractListModel, QModelIndex, pyqtSignal
 from dotenv import load_dotenv
+from inference import InferenceEngine, SCAM_LABEL, NORMAL_LABEL
+from telegram_io import TelegramRunner, SESSION_NAME, fetch_account
+from history_store import PAGE_SIZE
+from scan_service import ScanService, build_alert_sinks, DATA_FILES, SCAN_INTERVAL, SWEEP_INTERVAL
+from template_index import TEMPLATE_INDEX_FILE
+from indicators import INDICATOR_FILE
+from metrics import registry, start_server, METRICS_FILE
+
+MAX_VIEW_ROWS = PAGE_SIZE * 10
 api_id = int(os.getenv('api_id'))
 api_hash = os.getenv('api_hash')
-LOG_FILE = 'scan_log.json'
-LAST_SCAN_FILE = 'last_scan.json'
-_client_instance = None
+_telegram = None
+
+model_path = os.getenv('model_path', "./koelectra-romance-scam")
+model_backend = os.getenv('model_backend', 'torch')
+inference_threads = os.getenv('inference_threads')
+metrics_port = int(os.getenv('metrics_port') or 0)
+
+def load_classifier():
+    startup_timer.mark('model_load_started')
+    from model_loader import load_model, INFERENCE_THREADS
+    startup_timer.mark('torch_imported')
+    loaded = load_model(model_path, startup_timer, model_backend, int(inference_threads or INFERENCE_THREADS))
+    startup_timer.save()
+    return loaded
+
+def load_cascade_prefilter():
+    from prefilter import load_prefilter
+    threshold = os.getenv('prefilter_threshold')
+    return load_prefilter(model_path, float(threshold) if threshold else None)
+
+# 채점 서버가 떠 있으면 모델을 따로 올리지 않고 서버의 모델을 함께 사용
+scoring_url = os.getenv('scoring_url')
+if scoring_url:
+    from scoring_server import ScoringClient
+    engine = ScoringClient(scoring_url)
+else:
+    engine = InferenceEngine(load_classifier, start=False, prefilter_loader=load_cascade_prefilter)
+
+def get_telegram():
+    global _telegram
+    if _telegram is None:
+        _telegram = TelegramRunner(SESSION_NAME, api_id, api_hash)
+    return _telegram
 
-model_path = "./koelectra-romance-scam"
-tokenizer = AutoTokenizer.from_pretrained(model_path)
-model = AutoModelForSequenceClassification.from_pretrained(model_path)
+def get_client():
+    return get_telegram().client
 
-class AnalysisThread(QThread):
-    result_signal = pyqtSignal(str, str)
+def future_outcome(future):
+    try:
+        return future.result(), None
+    except BaseException as e:
+        return None, e
 
-    def __init__(self, name, texts):
+class HistoryModel(QAbstractListModel):
+    def __init__(self, store):
         super().__init__()
-        self.name = name
-        self.texts = texts
+        self.store = store
+        self.result_filter = None
+        self.rows = []
+        self.exhausted = False
+
+    def set_result_filter(self, result):
+        self.beginResetModel()
+        self.result_filter = result
+        self.rows = []
+        self.exhausted = False
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent):
+        before_id = self.rows[-1]['id'] if self.rows else None
+        page = self.store.query(result=self.result_filter, before_id=before_id, limit=PAGE_SIZE)
+        if len(page) < PAGE_SIZE:
+            self.exhausted = True
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+            self.rows.extend(page)
+            self.endInsertRows()
+
+    def prepend(self, log):
+        if self.result_filter and log['result'] != self.result_filter:
+            return
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self.rows.insert(0, log)
+        self.endInsertRows()
+        # 오래 켜 두어도 메모리가 늘지 않도록 화면에 들고 있는 기록 수를 제한 (나머지는 스크롤 시 다시 조회)
+        if len(self.rows) > MAX_VIEW_ROWS:
+            self.beginRemoveRows(QModelIndex(), MAX_VIEW_ROWS, len(self.rows) - 1)
+            del self.rows[MAX_VIEW_ROWS:]
+            self.endRemoveRows()
+            self.exhausted = False
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        log = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            text = f"[{log['time']}] {log['user']} → {log['result']}"
+            if log.get('indicators'):
+                text += f" ({', '.join(log['indicators'])})"
+            return text
+        if role == Qt.ForegroundRole:
+            return QColor('#ff4d4f') if log['result'] == SCAM_LABEL else QColor('#4caf50')
+        return None
 
-    def run(self):
-        joined = ' [SEP] '.join(self.texts)
-        label = predict_romance_scam(joined)
-        self.result_signal.emit(self.name, label)
+class TelegramWorker(QObject):
+    call_finished = pyqtSignal(object, object, object)
 
-def get_client():
-    global _client_instance
-    if _client_instance is None:
-        _client_instance = TelegramClient('scamdetect_session', api_id, api_hash)
-        _client_instance.connect()
-    return _client_instance
+    def __init__(self, runner):
+        super().__init__()
+        self.runner = runner
+        self.call_finished.connect(self._dispatch)
 
-def predict_romance_scam(text: str):
-    try:
-        model.eval()
-        inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=512)
-        with torch.no_grad():
-            outputs = model(**inputs)
-            probs = F.softmax(outputs.logits, dim=1)
-            pred = torch.argmax(probs, dim=1).item()
-        label = "로맨스 스캠" if pred == 1 else "정상 대화"
-        return label
-    except Exception as e:
-        return f'오류 발생: {str(e)}'
-
-def save_log(result):
-    logs = load_logs()
-    logs.insert(0, result)
-    with open(LOG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(logs[:100], f, indent=2, ensure_ascii=False)
-
-def load_logs():
-    if os.path.exists(LOG_FILE):
-        with open(LOG_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return []
-
-def save_last_scan(name):
-    data = load_last_scans()
-    data[name] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    with open(LAST_SCAN_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-
-def load_last_scans():
-    if os.path.exists(LAST_SCAN_FILE):
-        with open(LAST_SCAN_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+    def run(self, coro, callback=None):
+        future = self.runner.submit(coro)
+        future.add_done_callback(lambda f: self.call_finished.emit(callback, *future_outcome(f)))
+        return future
+
+    def _dispatch(self, callback, result, error):
+        if callback:
+            callback(result, error)
 
 class ScamDetectPopup(QWidget):
+    service_event = pyqtSignal(str, object)
+
     def __init__(self, tray_icon):
         super().__init__(flags=Qt.Popup)
         self.setWindowTitle('2Racker 로맨스 스캠 탐지기')
@@ -133,12 +192,12 @@ class ScamDetectPopup(QWidget):
             QLineEdit:focus, QSpinBox:focus {
                 border: 1px solid #0078d4;
             }
-            QListWidget {
+            QListWidget, QListView, QComboBox {
                 background-color: #2d3b4e;
                 border: none;
                 color: #ffffff;
             }
-            QListWidget::item:selected {
+            QListWidget::item:selected, QListView::item:selected {
                 background-color: #3e4b5e;
             }
             QProgressBar {
@@ -171,9 +230,15 @@ class ScamDetectPopup(QWidget):
         self.logs_tab = QWidget()
         self.settings_tab = QWidget()
 
-        self.scan_interval = 5
-        self.analysis_threads = []
+        self.scan_interval = SWEEP_INTERVAL
         self.privacy_agreed = False
+        self.telegram = TelegramWorker(get_telegram())
+        self.service = ScanService(get_client(), engine, alert_sinks=build_alert_sinks(os.getenv('alert_sinks')),
+                                   push=True, template_seed=os.path.join(model_path, TEMPLATE_INDEX_FILE),
+                                   indicator_seed=os.path.join(model_path, INDICATOR_FILE))
+        self.service.add_listener(self.service_event.emit)
+        self.service_event.connect(self.handle_service_event)
+        self.metrics_server = start_server(metrics_port) if metrics_port else None
 
         self.init_login_tab()
         self.init_status_tab()
@@ -194,15 +259,14 @@ class ScamDetectPopup(QWidget):
         self.timer.timeout.connect(self.auto_scan_selected_chats)
         self.timer.start(self.scan_interval * 60 * 1000)
 
-        if not os.path.exists('scamdetect_session.session'):
-            self.tabs.setCurrentWidget(self.login_tab)
-        else:
-            client = get_client()
-            if not client.is_user_authorized():
-                self.tabs.setCurrentWidget(self.login_tab)
-            else:
-                self.privacy_agreed = True
-                self.tabs.setCurrentWidget(self.status_tab)
+        self.tabs.setCurrentWidget(self.login_tab)
+        if os.path.exists(f'{SESSION_NAME}.session'):
+            self.telegram.run(get_client().is_user_authorized(), self.on_authorization_checked)
+
+    def on_authorization_checked(self, authorized, error):
+        if authorized:
+            self.privacy_agreed = True
+            self.tabs.setCurrentWidget(self.status_tab)
 
     def init_login_tab(self):
         layout = QVBoxLayout()
@@ -330,14 +394,14 @@ Telegram 제공 데이터는 분석 완료 즉시 처리되며, 분석 로그는
         QMessageBox.information(self, '동의 완료', '개인정보 처리방침에 동의하셨습니다.')
 
     def send_code(self):
-        try:
-            self.client = TelegramClient('scamdetect_session', api_id, api_hash)
-            self.client.connect()
-            phone = self.phone_input.text().strip()
-            self.client.send_code_request(phone)
+        phone = self.phone_input.text().strip()
+        self.telegram.run(get_client().send_code_request(phone), self.on_code_sent)
+
+    def on_code_sent(self, result, error):
+        if error:
+            QMessageBox.critical(self, '에러', f'코드 전송 실패: {str(error)}')
+        else:
             QMessageBox.information(self, '코드 전송', 'Telegram 앱으로 인증 코드가 전송되었습니다.')
-        except Exception as e:
-            QMessageBox.critical(self, '에러', f'코드 전송 실패: {str(e)}')
 
     def sign_in(self):
         if not self.privacy_agreed:
@@ -346,17 +410,17 @@ Telegram 제공 데이터는 분석 완료 즉시 처리되며, 분석 로그는
         
         phone = self.phone_input.text().strip()
         code = self.code_input.text().strip()
-        try:
-            self.client.sign_in(phone, code)
-            global _client_instance
-            _client_instance = self.client
-            self.current_phone = phone
-            QMessageBox.information(self, '성공', '로그인 완료!')
-            self.populate_chat_list()
-            self.update_account_info()
-            self.tabs.setCurrentWidget(self.status_tab)
-        except Exception as e:
-            QMessageBox.critical(self, '로그인 실패', str(e))
+        self.telegram.run(get_client().sign_in(phone, code), lambda result, error: self.on_signed_in(phone, error))
+
+    def on_signed_in(self, phone, error):
+        if error:
+            QMessageBox.critical(self, '로그인 실패', str(error))
+            return
+        self.current_phone = phone
+        QMessageBox.information(self, '성공', '로그인 완료!')
+        self.populate_chat_list()
+        self.update_account_info()
+        self.tabs.setCurrentWidget(self.status_tab)
 
     def init_status_tab(self):
         layout = QVBoxLayout()
@@ -386,74 +450,70 @@ Telegram 제공 데이터는 분석 완료 즉시 처리되며, 분석 로그는
         self.populate_chat_list()
 
     def populate_chat_list(self):
+        self.fill_chat_list()
+        self.telegram.run(self.service.refresh_dialogs())
+
+    def fill_chat_list(self):
         self.chat_list.clear()
-        client = get_client()
-        try:
-            dialogs = client.get_dialogs()
-            last_scans = load_last_scans()
-            for dialog in dialogs:
-                if dialog.is_user:
-                    item = QListWidgetItem(dialog.name)
-                    if dialog.name in last_scans:
-                        item.setToolTip(f'마지막 분석: {last_scans[dialog.name]}')
-                    self.chat_list.addItem(item)
-        except Exception:
-            pass
+        for dialog in self.service.index.users():
+            item = QListWidgetItem(dialog.name)
+            item.setData(Qt.UserRole, dialog.id)
+            last_scan = self.service.state.get(dialog.id).get('time')
+            if last_scan:
+                item.setToolTip(f'마지막 분석: {last_scan}')
+            self.chat_list.addItem(item)
 
     def analyze_single_chat(self, item):
-        name = item.text()
-        self.analyze_chat(name)
+        self.analyze_chat(item.data(Qt.UserRole))
 
-    def analyze_chat(self, name):
-        client = get_client()
-        try:
-            dialog = next((d for d in client.get_dialogs() if d.name == name), None)
-            if not dialog:
-                return
-            messages = client.iter_messages(dialog.entity, limit=10)
-            texts = [msg.text.strip() for msg in messages if msg.text]
-            if not texts:
-                return
-            
-            analysis_thread = AnalysisThread(name, texts)
-            analysis_thread.result_signal.connect(self.handle_analysis_result)
-            self.analysis_threads.append(analysis_thread)
-            analysis_thread.start()
-            
-        except Exception as e:
-            self.status_label.setText(f'오류 발생: {str(e)}')
+    def analyze_chat(self, peer_id):
+        self.telegram.run(self.service.scan_chat(peer_id), self.on_scan_finished)
 
-    def handle_analysis_result(self, name, label):
-        save_last_scan(name)
-        log = {'user': name, 'result': label, 'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-        save_log(log)
+    def handle_service_event(self, event, payload):
+        if event == 'dialogs_refreshed':
+            self.fill_chat_list()
+        elif event == 'scan_started':
+            self.progress_bar.setVisible(True)
+            self.progress_bar.setMaximum(payload['total'])
+            self.progress_bar.setValue(0)
+        elif event == 'progress':
+            self.progress_bar.setValue(payload['done'])
+        elif event == 'scan_finished':
+            self.progress_bar.setVisible(False)
+        elif event == 'unchanged':
+            self.status_label.setText(f"'{payload['name']}' 새 메시지 없음")
+        elif event == 'error':
+            self.status_label.setText(f"오류 발생: {payload['error']}")
+        elif event == 'result':
+            self.handle_analysis_result(payload['entry'])
+
+    def handle_analysis_result(self, log):
+        name = log['user']
+        label = log['result']
+        self.log_model.prepend(log)
         self.status_label.setText(f"'{name}' 분석 완료 → {label}")
-        self.refresh_logs()
-        if label == '로맨스 스캠':
+        if label == SCAM_LABEL:
             self.tray_icon.showMessage('스캠 감지!', f'Telegram의 {name} 채팅에서 로맨스 스캠이 감지되었습니다.', QSystemTrayIcon.Critical)
 
+    def on_scan_finished(self, counts, error):
+        if error:
+            self.status_label.setText(f'오류 발생: {str(error)}')
+
     def auto_scan_selected_chats(self):
         self.run_full_scan()
 
     def run_full_scan(self):
-        client = get_client()
-        try:
-            dialogs = client.get_dialogs()
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setMaximum(len([d for d in dialogs if d.is_user]))
-            self.progress_bar.setValue(0)
-            
-            for dialog in dialogs:
-                if not dialog.is_user:
-                    continue
-                self.analyze_chat(dialog.name)
-                self.progress_bar.setValue(self.progress_bar.value() + 1)
-            
-            self.progress_bar.setVisible(False)
-            self.status_label.setText('전체 분석 완료')
-        except Exception:
-            self.progress_bar.setVisible(False)
+        self.telegram.run(self.service.full_scan(), self.on_full_scan_finished)
+
+    def on_full_scan_finished(self, counts, error):
+        if counts is None and not error:
+            return
+        if error:
             self.status_label.setText('분석 중 오류 발생')
+        elif counts['deferred']:
+            self.status_label.setText(f"전체 분석 완료 (다음 주기로 미룬 채팅 {counts['deferred']}개)")
+        else:
+            self.status_label.setText('전체 분석 완료')
 
     def init_logs_tab(self):
         layout = QVBoxLayout()
@@ -463,19 +523,43 @@ Telegram 제공 데이터는 분석 완료 즉시 처리되며, 분석 로그는
         header_label.setStyleSheet('font-size: 16px; font-weight: bold; color: #ffffff;')
         layout.addWidget(header_label)
         
-        self.log_list = QListWidget()
+        self.log_filter = QComboBox()
+        self.log_filter.addItem('전체', None)
+        self.log_filter.addItem(SCAM_LABEL, SCAM_LABEL)
+        self.log_filter.addItem(NORMAL_LABEL, NORMAL_LABEL)
+        self.log_filter.currentIndexChanged.connect(self.refresh_logs)
+        layout.addWidget(self.log_filter)
+
+        self.log_model = HistoryModel(self.service.history)
+        self.log_list = QListView()
+        self.log_list.setUniformItemSizes(True)
+        self.log_list.setModel(self.log_model)
+        self.log_list.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.log_list.customContextMenuRequested.connect(self.show_log_menu)
         layout.addWidget(self.log_list)
         self.logs_tab.setLayout(layout)
-        self.refresh_logs()
+
+    def show_log_menu(self, pos):
+        index = self.log_list.indexAt(pos)
+        if not index.isValid():
+            return
+        log = self.log_model.rows[index.row()]
+        if log.get('chat_id') is None:
+            return
+        menu = QMenu(self)
+        confirm_action = menu.addAction('스캠으로 확정 (문구 등록)')
+        if menu.exec_(self.log_list.viewport().mapToGlobal(pos)) == confirm_action:
+            self.telegram.run(self.service.confirm_scam(log['chat_id']),
+                              lambda added, error: self.on_scam_confirmed(log['user'], added, error))
+
+    def on_scam_confirmed(self, name, added, error):
+        if error:
+            self.status_label.setText(f'오류 발생: {str(error)}')
+        else:
+            self.status_label.setText(f"'{name}' 스캠 확정: 새 문구 {added}개 등록")
 
     def refresh_logs(self):
-        self.log_list.clear()
-        logs = load_logs()
-        for log in logs:
-            text = f"[{log['time']}] {log['user']} → {log['result']}"
-            item = QListWidgetItem(text)
-            item.setForeground(QColor('#ff4d4f') if log['result'] == '로맨스 스캠' else QColor('#4caf50'))
-            self.log_list.addItem(item)
+        self.log_model.set_result_filter(self.log_filter.currentData())
 
     def init_settings_tab(self):
         layout = QVBoxLayout()
@@ -493,47 +577,74 @@ Telegram 제공 데이터는 분석 완료 즉시 처리되며, 분석 로그는
         logout_btn.clicked.connect(self.logout)
         layout.addWidget(logout_btn)
 
-        layout.addWidget(QLabel('자동 분석 주기 (분)'))
+        self.push_check = QCheckBox('새 메시지 실시간 감지')
+        self.push_check.setStyleSheet('color: #a0b3c5;')
+        self.push_check.setChecked(self.service.push_enabled)
+        self.push_check.toggled.connect(self.update_push)
+        layout.addWidget(self.push_check)
+
+        layout.addWidget(QLabel('전체 점검 주기 (분)'))
         self.interval_spin = QSpinBox()
-        self.interval_spin.setMinimum(1)
+        self.interval_spin.setRange(1, 24 * 60)
         self.interval_spin.setValue(self.scan_interval)
         self.interval_spin.valueChanged.connect(self.update_interval)
         layout.addWidget(self.interval_spin)
 
+        layout.addWidget(QLabel('동시 조회 채팅 수'))
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, 64)
+        self.concurrency_spin.setValue(self.service.concurrency)
+        self.concurrency_spin.valueChanged.connect(self.update_concurrency)
+        layout.addWidget(self.concurrency_spin)
+
+        layout.addWidget(QLabel('진단 정보'))
+        self.diagnostics_text = QTextEdit()
+        self.diagnostics_text.setReadOnly(True)
+        self.diagnostics_text.setFont(QFont('Consolas', 9))
+        self.diagnostics_text.setFixedHeight(180)
+        layout.addWidget(self.diagnostics_text)
+
+        export_btn = QPushButton('진단 지표 내보내기')
+        export_btn.clicked.connect(self.export_metrics)
+        layout.addWidget(export_btn)
+
+        self.diagnostics_timer = QTimer(self)
+        self.diagnostics_timer.timeout.connect(self.refresh_diagnostics)
+
         layout.addStretch()
         self.settings_tab.setLayout(layout)
         self.update_account_info()
 
     def update_account_info(self):
-        try:
-            client = get_client()
-            if client.is_user_authorized():
-                me = client.get_me()
-                name = f"{me.first_name or ''} {me.last_name or ''}".strip()
-                username = f"(@{me.username})" if me.username else ''
-                phone = getattr(me, 'phone', self.current_phone if hasattr(self, 'current_phone') else '')
-                info = f"이름: {name}\n전화번호: {phone} {username}"
-            else:
-                info = "로그인 필요"
-        except Exception:
+        self.telegram.run(fetch_account(get_client()), self.on_account_loaded)
+
+    def on_account_loaded(self, me, error):
+        if error:
             info = "계정 정보를 불러올 수 없습니다."
+        elif me is None:
+            info = "로그인 필요"
+        else:
+            name = f"{me.first_name or ''} {me.last_name or ''}".strip()
+            username = f"(@{me.username})" if me.username else ''
+            phone = getattr(me, 'phone', self.current_phone if hasattr(self, 'current_phone') else '')
+            info = f"이름: {name}\n전화번호: {phone} {username}"
         self.account_label.setText(info)
 
     def logout(self):
+        global _telegram
         try:
-            client = get_client()
-            client.log_out()
-            client.disconnect()
-        except Exception:
-            pass
-        global _client_instance
-        _client_instance = None
-        try:
-            os.remove('scamdetect_session.session')
-            os.remove(LOG_FILE)
-            os.remove(LAST_SCAN_FILE)
+            telegram = get_telegram()
+            telegram.call(telegram.client.log_out(), timeout=10)
+            telegram.close()
         except Exception:
             pass
+        _telegram = None
+        self.service.close()
+        for path in (f'{SESSION_NAME}.session',) + DATA_FILES:
+            try:
+                os.remove(path)
+            except Exception:
+                pass
         QApplication.quit()
 
     def update_interval(self, value):
@@ -541,9 +652,45 @@ Telegram 제공 데이터는 분석 완료 즉시 처리되며, 분석 로그는
         self.timer.stop()
         self.timer.start(self.scan_interval * 60 * 1000)
 
+    def update_push(self, enabled):
+        self.service.push_enabled = enabled
+        # 실시간 감지를 끄면 새 메시지를 주기 점검으로만 찾으므로 기본 점검 주기로 되돌림
+        self.interval_spin.setValue(SWEEP_INTERVAL if enabled else SCAN_INTERVAL)
+
+    def update_concurrency(self, value):
+        self.service.concurrency = value
+
+    def refresh_diagnostics(self):
+        lines = [f"{'단계':<16}{'건수':>7}{'평균':>10}{'p50':>10}{'p95':>10}"]
+        for stage, summary in sorted(registry.stage_summary().items()):
+            lines.append(f"{stage:<16}{summary['count']:>7}{summary['mean'] * 1000:>8.1f}ms"
+                         f"{summary['p50'] * 1000:>8.0f}ms{summary['p95'] * 1000:>8.0f}ms")
+        outcomes = {name: int(registry.value('chats_total', outcome=name))
+                    for name in ('scanned', 'skipped', 'deferred', 'superseded', 'errors')}
+        lines.append('')
+        lines.append('채팅: ' + ', '.join(f'{name} {count}' for name, count in outcomes.items()))
+        lines.append(f"추론 대기열: {int(registry.value('inference_queue_depth'))}  "
+                     f"전 단계 필터 처리: {int(registry.value('prefilter_skipped_total'))}건")
+        lines.append(f"FloodWait: {int(registry.value('flood_waits_total'))}회 "
+                     f"({int(registry.value('flood_wait_seconds_total'))}초)")
+        if self.metrics_server is not None:
+            lines.append(f'지표 주소: http://127.0.0.1:{metrics_port}/metrics')
+        self.diagnostics_text.setPlainText('\n'.join(lines))
+
+    def export_metrics(self):
+        try:
+            registry.export(METRICS_FILE)
+            QMessageBox.information(self, '내보내기 완료', f"'{os.path.abspath(METRICS_FILE)}'로 저장되었습니다.")
+        except Exception as e:
+            QMessageBox.critical(self, '에러', f'지표 저장 실패: {str(e)}')
+
     def on_tab_changed(self, index):
         if self.tabs.widget(index) == self.settings_tab:
             self.update_account_info()
+            self.refresh_diagnostics()
+            self.diagnostics_timer.start(2000)
+        else:
+            self.diagnostics_timer.stop()
 
     def show_at_cursor(self):
         self.adjustSize()
@@ -568,6 +715,8 @@ def generate_tray_icon():
     return QIcon(pixmap)
 
 def launch_app():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+    startup_timer.mark('modules_imported')
     app = QApplication([])
     app.setQuitOnLastWindowClosed(False)
     app.setFont(QFont('Segoe UI', 10))
@@ -580,6 +729,7 @@ def launch_app():
     tray_icon.setToolTip('2Racker 로맨스 스캠 탐지기')
 
     popup = ScamDetectPopup(tray_icon)
+    startup_timer.mark('popup_created')
 
     tray_menu = QMenu()
     open_action = QAction('시스템 열기')
@@ -593,6 +743,8 @@ def launch_app():
     tray_icon.setContextMenu(tray_menu)
     tray_icon.activated.connect(lambda reason: popup.show_at_cursor() if reason == QSystemTrayIcon.Trigger else None)
     tray_icon.show()
+    startup_timer.mark('tray_shown')
+    engine.start()
 
     return app.exec_()
 
@@ -0,0 +1,164 @@
+import os
+import bisect
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_FILE = 'metrics.prom'
+METRICS_HOST = '127.0.0.1'
+PREFIX = 'racker_'
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+HELP = {
+    'scan_stage_seconds': '분석 단계별 소요 시간',
+    'inference_batch_size': '모델 한 번 실행에 묶인 윈도우 수',
+    'chats_total': '분석 결과별 채팅 수',
+    'flood_waits_total': 'Telegram FloodWait 발생 횟수',
+    'flood_wait_seconds_total': 'FloodWait로 대기한 시간 합계',
+    'inference_windows_total': '모델에 넣은 윈도우 수',
+    'prefilter_skipped_total': '전 단계 필터가 모델 없이 처리한 요청 수',
+    'inference_queue_depth': '추론 대기열 길이',
+    'scoring_requests_total': '채점 서버 응답 상태별 요청 수',
+    'scoring_pending': '채점 서버에서 처리 중인 대화 수',
+    'indicator_hits_total': '분류별 스캠 지표 일치 수',
+}
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        # 구간 상한으로 근사: 정확한 값 대신 어느 구간에 속하는지만 보면 되는 용도
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+
+def format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.gauges = {}
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            self.counters[name, tuple(sorted(labels.items()))] += value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = name, tuple(sorted(labels.items()))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def gauge(self, name, fn):
+        # 값은 조회할 때 읽어 옴 (예: 대기열 길이)
+        with self._lock:
+            self.gauges[name] = fn
+
+    def _gauge_values(self):
+        values = {}
+        for name, fn in self.gauges.items():
+            try:
+                values[name] = float(fn())
+            except Exception:
+                continue
+        return values
+
+    def value(self, name, **labels):
+        with self._lock:
+            if name in self.gauges:
+                return self._gauge_values().get(name, 0.0)
+            return self.counters.get((name, tuple(sorted(labels.items()))), 0.0)
+
+    def stage_summary(self):
+        with self._lock:
+            return {dict(labels)['stage']: {
+                'count': h.count, 'mean': h.sum / h.count, 'p50': h.quantile(0.5), 'p95': h.quantile(0.95),
+            } for (name, labels), h in self.histograms.items() if name == 'scan_stage_seconds' and h.count}
+
+    def render(self):
+        lines = []
+        with self._lock:
+            families = defaultdict(list)
+            for (name, labels), value in self.counters.items():
+                families[name, 'counter'].append((labels, value))
+            for (name, labels), histogram in self.histograms.items():
+                families[name, 'histogram'].append((labels, histogram))
+            for name, value in self._gauge_values().items():
+                families[name, 'gauge'].append(((), value))
+            for (name, kind), series in sorted(families.items()):
+                full = PREFIX + name
+                lines.append(f'# HELP {full} {HELP.get(name, name)}')
+                lines.append(f'# TYPE {full} {kind}')
+                for labels, value in sorted(series, key=lambda item: item[0]):
+                    if kind != 'histogram':
+                        lines.append(f'{full}{format_labels(labels)} {format_value(value)}')
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(value.buckets + (float('inf'),), value.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else format_value(bound)
+                        lines.append(f'{full}_bucket{format_labels(labels + (("le", le),))} {cumulative}')
+                    lines.append(f'{full}_sum{format_labels(labels)} {format_value(value.sum)}')
+                    lines.append(f'{full}_count{format_labels(labels)} {value.count}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path=METRICS_FILE):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+registry = MetricsRegistry()
+
+
+def start_server(port, host=METRICS_HOST, source=registry):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = source.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
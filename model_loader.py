@@ -0,0 +1,261 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+MODEL_PATH = './koelectra-romance-scam'
+BACKEND = 'torch'
+ONNX_FILE = 'model.onnx'
+SAFETENSORS_FILE = 'model.safetensors'
+PARITY_FILE = 'parity_report.json'
+WARMUP_TEXT = '안녕하세요 [SEP] 오늘 하루 어땠어요?'
+MAX_LENGTH = 512
+PARITY_BATCH_SIZE = 16
+MIN_AGREEMENT = 0.99
+MAX_F1_DROP = 0.01
+# 추론 스레드 수를 명시하지 않으면 torch가 모든 코어를 잡아 GUI·텔레그램 스레드와 경합함
+INFERENCE_THREADS = max(1, (os.cpu_count() or 2) // 2)
+
+logger = logging.getLogger('2racker.model')
+
+
+def pad_rows(rows, pad_id):
+    # 배치 내 가장 긴 요청 길이까지만 패딩
+    longest = max(len(ids) for ids in rows)
+    input_ids = np.full((len(rows), longest), pad_id, dtype=np.int64)
+    attention_mask = np.zeros((len(rows), longest), dtype=np.int64)
+    for row, ids in enumerate(rows):
+        input_ids[row, :len(ids)] = ids
+        attention_mask[row, :len(ids)] = 1
+    return input_ids, attention_mask
+
+
+class TorchClassifier:
+    name = 'torch'
+
+    def __init__(self, model_path, pad_id):
+        self.pad_id = pad_id
+        self.model = self._load(model_path)
+        self.model.eval()
+
+    def _load(self, model_path):
+        return AutoModelForSequenceClassification.from_pretrained(model_path)
+
+    def predict(self, rows):
+        input_ids, attention_mask = pad_rows(rows, self.pad_id)
+        with torch.no_grad():
+            logits = self.model(
+                input_ids=torch.from_numpy(input_ids), attention_mask=torch.from_numpy(attention_mask)
+            ).logits
+            return F.softmax(logits, dim=1)[:, 1].tolist()
+
+
+class QuantizedTorchClassifier(TorchClassifier):
+    name = 'int8'
+
+    def _load(self, model_path):
+        model = AutoModelForSequenceClassification.from_pretrained(model_path)
+        model.eval()
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class SharedTorchClassifier(TorchClassifier):
+    # from_pretrained는 뼈대를 메타 디바이스(스레드 단위)로 만든 뒤 safetensors 파일을 매핑한 텐서를 복사 없이 씀:
+    # 같은 파일을 여는 워커 프로세스끼리 가중치 메모리 페이지를 공유
+    name = 'mmap'
+
+    def _load(self, model_path):
+        path = os.path.join(model_path, SAFETENSORS_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f'{path} 없음: safetensors 형식으로 저장된 모델이 필요합니다')
+        return AutoModelForSequenceClassification.from_pretrained(model_path)
+
+
+class OnnxClassifier:
+    name = 'onnx'
+
+    def __init__(self, model_path, pad_id):
+        import onnxruntime
+        self.pad_id = pad_id
+        path = os.path.join(model_path, ONNX_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f'{path} 없음: python model_loader.py export 로 먼저 변환하세요')
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = torch.get_num_threads()
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+
+    def predict(self, rows):
+        input_ids, attention_mask = pad_rows(rows, self.pad_id)
+        logits = self.session.run(['logits'], {'input_ids': input_ids, 'attention_mask': attention_mask})[0]
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        return (probs[:, 1] / probs.sum(axis=1)).tolist()
+
+
+BACKENDS = {
+    'torch': TorchClassifier,
+    'int8': QuantizedTorchClassifier,
+    'mmap': SharedTorchClassifier,
+    'onnx': OnnxClassifier,
+}
+# mmap은 torch와 같은 가중치를 그대로 읽으므로 기본 parity 대상에서 제외
+PARITY_BACKENDS = ('torch', 'int8', 'onnx')
+
+
+def load_parity_report(model_path):
+    path = os.path.join(model_path, PARITY_FILE)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def is_verified(model_path, backend):
+    # mmap은 같은 가중치를 복사 없이 읽을 뿐이므로 torch와 결과가 같음
+    if backend in ('torch', 'mmap'):
+        return True
+    result = load_parity_report(model_path).get('backends', {}).get(backend)
+    if not result:
+        return False
+    return result['agreement'] >= MIN_AGREEMENT and -result['delta']['f1'] <= MAX_F1_DROP
+
+
+def load_backend(backend, model_path, pad_id):
+    if backend not in BACKENDS:
+        raise ValueError(f'unknown backend: {backend}')
+    return BACKENDS[backend](model_path, pad_id)
+
+
+def set_threads(threads=INFERENCE_THREADS):
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # 이미 병렬 작업이 시작된 뒤에는 바꿀 수 없음
+        pass
+
+
+def load_model(model_path=MODEL_PATH, timer=None, backend=BACKEND, threads=INFERENCE_THREADS):
+    set_threads(threads)
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    if timer:
+        timer.mark('tokenizer_loaded')
+    # 정확도 검증(parity)을 통과하지 못한 백엔드는 사용하지 않음
+    if not is_verified(model_path, backend):
+        logger.warning('%s 백엔드의 parity 검증 결과가 없거나 기준 미달이므로 torch 백엔드를 사용합니다', backend)
+        backend = 'torch'
+    classifier = load_backend(backend, model_path, tokenizer.pad_token_id or 0)
+    if timer:
+        timer.mark('weights_loaded')
+    classifier.predict([tokenizer(WARMUP_TEXT)['input_ids']])
+    if timer:
+        timer.mark('model_warm')
+    return tokenizer, classifier
+
+
+def export_onnx(model_path=MODEL_PATH, opset=17):
+    model = AutoModelForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+    sample = torch.ones((2, 8), dtype=torch.long)
+    path = os.path.join(model_path, ONNX_FILE)
+    torch.onnx.export(
+        model, (sample, sample), path,
+        input_names=['input_ids', 'attention_mask'],
+        output_names=['logits'],
+        dynamic_axes={
+            'input_ids': {0: 'batch', 1: 'sequence'},
+            'attention_mask': {0: 'batch', 1: 'sequence'},
+            'logits': {0: 'batch'},
+        },
+        opset_version=opset,
+        dynamo=False,
+    )
+    return path
+
+
+def score_texts(classifier, tokenizer, texts, batch_size=PARITY_BATCH_SIZE):
+    rows = tokenizer(texts, truncation=True, max_length=MAX_LENGTH)['input_ids']
+    order = sorted(range(len(rows)), key=lambda i: len(rows[i]))
+    probs = [0.0] * len(rows)
+    started = time.perf_counter()
+    for start in range(0, len(order), batch_size):
+        chunk = order[start:start + batch_size]
+        for i, prob in zip(chunk, classifier.predict([rows[i] for i in chunk])):
+            probs[i] = prob
+    return probs, time.perf_counter() - started
+
+
+def parity_dataset(dataset_path=None):
+    # 기본 데이터셋은 실행 위치가 아닌 저장소 폴더 기준
+    from evaluation import DATASET_PATH
+    return dataset_path or os.path.join(os.path.dirname(os.path.abspath(__file__)), DATASET_PATH)
+
+
+def run_parity(model_path=MODEL_PATH, backends=PARITY_BACKENDS, dataset_path=None):
+    from evaluation import load_holdout, score_metrics
+    texts, labels = load_holdout(parity_dataset(dataset_path))
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    pad_id = tokenizer.pad_token_id or 0
+    reference = None
+    results = {}
+    for backend in ('torch',) + tuple(b for b in backends if b != 'torch'):
+        if backend == 'mmap' and not os.path.exists(os.path.join(model_path, SAFETENSORS_FILE)):
+            logger.warning('%s 없음: mmap 백엔드 검증을 건너뜁니다', SAFETENSORS_FILE)
+            continue
+        classifier = load_backend(backend, model_path, pad_id)
+        probs, elapsed = score_texts(classifier, tokenizer, texts)
+        preds = [1 if p > 0.5 else 0 for p in probs]
+        metrics = score_metrics(labels, preds)
+        if reference is None:
+            reference = {'preds': preds, 'probs': probs, 'metrics': metrics}
+        results[backend] = {
+            'agreement': sum(a == b for a, b in zip(preds, reference['preds'])) / len(preds),
+            'max_prob_diff': max(abs(a - b) for a, b in zip(probs, reference['probs'])),
+            'metrics': metrics,
+            'delta': {k: metrics[k] - reference['metrics'][k] for k in metrics},
+            'ms_per_sample': elapsed * 1000 / len(texts),
+        }
+    report = {'samples': len(texts), 'backends': results}
+    with open(os.path.join(model_path, PARITY_FILE), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='2Racker 추론 백엔드 변환 및 정확도 검증')
+    parser.add_argument('--model-path', default=MODEL_PATH)
+    sub = parser.add_subparsers(dest='command', required=True)
+    export = sub.add_parser('export', help='ONNX 그래프로 변환한 뒤 parity 검증까지 실행')
+    export.add_argument('--dataset', default=None, help='기본값: 저장소의 final_set.csv')
+    parity = sub.add_parser('parity', help='held-out 데이터로 백엔드별 예측 일치율 검증')
+    parity.add_argument('--backends', nargs='+', default=list(PARITY_BACKENDS), choices=list(BACKENDS))
+    parity.add_argument('--dataset', default=None, help='기본값: 저장소의 final_set.csv')
+    args = parser.parse_args(argv)
+
+    dataset = parity_dataset(args.dataset)
+    if not os.path.exists(dataset):
+        # 변환을 마친 뒤에 실패하지 않도록 먼저 확인
+        parser.error(f'데이터셋이 없습니다: {dataset}')
+    if args.command == 'export':
+        print(f'ONNX 저장: {export_onnx(args.model_path)}')
+        report = run_parity(args.model_path, dataset_path=dataset)
+    else:
+        report = run_parity(args.model_path, tuple(args.backends), dataset)
+    for backend, result in report['backends'].items():
+        verdict = 'OK' if is_verified(args.model_path, backend) else 'FAIL'
+        print(f"{backend:6s} agreement={result['agreement']:.4f} f1={result['metrics']['f1']:.4f} "
+              f"Δf1={result['delta']['f1']:+.4f} {result['ms_per_sample']:.2f}ms/sample {verdict}")
+    return 0 if all(is_verified(args.model_path, b) for b in report['backends']) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+import numpy as np
+
+PREFILTER_FILE = 'prefilter.joblib'
+PREFILTER_REPORT = 'prefilter_report.json'
+MAX_RECALL_DROP = 0.01
+THRESHOLDS = tuple(round(t, 2) for t in np.arange(0.02, 0.51, 0.02))
+
+logger = logging.getLogger('2racker.prefilter')
+
+
+class Prefilter:
+    def __init__(self, pipeline, threshold):
+        self.pipeline = pipeline
+        self.threshold = threshold
+
+    def score_many(self, texts):
+        return self.pipeline.predict_proba(list(texts))[:, 1].tolist()
+
+    def score(self, text):
+        return self.score_many([text])[0]
+
+    def is_benign(self, prob):
+        return prob < self.threshold
+
+
+def build_pipeline():
+    from sklearn.pipeline import make_pipeline
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    return make_pipeline(
+        TfidfVectorizer(analyzer='char_wb', ngram_range=(2, 4), min_df=2, sublinear_tf=True, max_features=200000),
+        LogisticRegression(C=4.0, class_weight='balanced', max_iter=1000),
+    )
+
+
+def load_report(model_path):
+    path = os.path.join(model_path, PREFILTER_REPORT)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def load_prefilter(model_path, threshold=None):
+    path = os.path.join(model_path, PREFILTER_FILE)
+    if not os.path.exists(path):
+        return None
+    if threshold is None:
+        threshold = load_report(model_path).get('recommended_threshold')
+    # 재현율 손실을 검증한 임계값이 없으면 전 단계 필터를 쓰지 않음
+    if not threshold:
+        logger.warning('%s 검증 결과가 없어 전 단계 필터를 사용하지 않습니다', PREFILTER_REPORT)
+        return None
+    import joblib
+    return Prefilter(joblib.load(path), float(threshold))
+
+
+def train(model_path, dataset_path):
+    import joblib
+    from evaluation import load_splits
+    train_set = load_splits(dataset_path)['train']
+    pipeline = build_pipeline()
+    started = time.perf_counter()
+    pipeline.fit(list(train_set['text']), list(train_set['label']))
+    logger.info('prefilter trained on %d samples in %.1fs', len(train_set), time.perf_counter() - started)
+    joblib.dump(pipeline, os.path.join(model_path, PREFILTER_FILE))
+    return pipeline
+
+
+def sweep(model_path, dataset_path, pipeline=None, backend='torch'):
+    import joblib
+    from evaluation import load_holdout, score_metrics
+    from model_loader import load_model, score_texts
+    texts, labels = load_holdout(dataset_path)
+    if pipeline is None:
+        pipeline = joblib.load(os.path.join(model_path, PREFILTER_FILE))
+
+    started = time.perf_counter()
+    lexical = pipeline.predict_proba(texts)[:, 1]
+    lexical_ms = (time.perf_counter() - started) * 1000 / len(texts)
+    tokenizer, classifier = load_model(model_path, backend=backend)
+    probs, elapsed = score_texts(classifier, tokenizer, texts)
+    model_preds = [1 if p > 0.5 else 0 for p in probs]
+    baseline = score_metrics(labels, model_preds)
+
+    rows = []
+    for threshold in THRESHOLDS:
+        skipped = lexical < threshold
+        preds = [0 if skip else pred for skip, pred in zip(skipped, model_preds)]
+        metrics = score_metrics(labels, preds)
+        rows.append({
+            'threshold': threshold,
+            'compute_saved': float(skipped.mean()),
+            'recall_drop': baseline['recall'] - metrics['recall'],
+            'missed_scams': int(sum(1 for skip, label in zip(skipped, labels) if skip and label == 1)),
+            'metrics': metrics,
+        })
+    passing = [row for row in rows if row['recall_drop'] <= MAX_RECALL_DROP]
+    report = {
+        'samples': len(texts),
+        'max_recall_drop': MAX_RECALL_DROP,
+        'lexical_ms_per_sample': lexical_ms,
+        'model_ms_per_sample': elapsed * 1000 / len(texts),
+        'lexical_metrics': score_metrics(labels, [1 if p > 0.5 else 0 for p in lexical]),
+        'model_metrics': baseline,
+        'thresholds': rows,
+        'recommended_threshold': max(passing, key=lambda r: r['compute_saved'])['threshold'] if passing else None,
+    }
+    with open(os.path.join(model_path, PREFILTER_REPORT), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
+
+
+def print_report(report):
+    print(f"전 단계 필터 {report['lexical_ms_per_sample']:.3f}ms/건, 모델 {report['model_ms_per_sample']:.2f}ms/건 "
+          f"(held-out {report['samples']}건)")
+    print('threshold  절감률   재현율 손실  놓친 스캠  f1')
+    for row in report['thresholds']:
+        mark = ' *' if row['threshold'] == report['recommended_threshold'] else ''
+        print(f"{row['threshold']:9.2f}  {row['compute_saved']:6.1%}  {row['recall_drop']:+10.4f}  "
+              f"{row['missed_scams']:8d}  {row['metrics']['f1']:.4f}{mark}")
+    print(f"권장 임계값: {report['recommended_threshold']}")
+
+
+def main(argv=None):
+    from model_loader import MODEL_PATH
+    from evaluation import DATASET_PATH
+    parser = argparse.ArgumentParser(description='2Racker 문자 n-gram 전 단계 필터 학습 및 임계값별 재현율/연산 절감 검증')
+    parser.add_argument('--model-path', default=MODEL_PATH)
+    parser.add_argument('--dataset', default=DATASET_PATH)
+    parser.add_argument('--backend', default='torch')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('train', help='학습 후 임계값 검증까지 실행')
+    sub.add_parser('sweep', help='저장된 필터로 임계값 검증만 다시 실행')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+
+    pipeline = train(args.model_path, args.dataset) if args.command == 'train' else None
+    report = sweep(args.model_path, args.dataset, pipeline, args.backend)
+    print_report(report)
+    return 0 if report['recommended_threshold'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
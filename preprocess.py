@@ -0,0 +1,168 @@
+import os
+import sys
+import hashlib
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from inference import MESSAGE_SEP
+from template_index import signature, band_keys, NUM_PERM
+
+CHUNK_ROWS = 50000
+CONV_COLUMNS = [f'conv{i}' for i in range(1, 14)]
+GROUP_SIZE = 5
+NEAR_DUPLICATE = 0.9
+
+
+def join_columns(frame, columns, sep=MESSAGE_SEP):
+    # 빈 칸을 건너뛰고 구분자로 잇기: 비어 있지 않은 칸마다 구분자를 붙여 합친 뒤 맨 앞 구분자만 제거
+    joined = pd.Series('', index=frame.index)
+    for column in columns:
+        cell = frame[column].fillna('').astype(str).str.strip()
+        joined += (sep + cell).where(cell != '', '')
+    return joined.str[len(sep):]
+
+
+def process_original(frame):
+    text = join_columns(frame, [c for c in CONV_COLUMNS if c in frame.columns])
+    label = (frame['classification'].fillna('').astype(str).str.strip().str.lower() == 'yes').astype(int)
+    return pd.DataFrame({'text': text, 'label': label})
+
+
+def process_good(frame, group_size=GROUP_SIZE):
+    frame = frame.dropna(subset=['req', 'res'])
+    pairs = (frame['req'].astype(str) + MESSAGE_SEP + frame['res'].astype(str)).to_numpy()
+    usable = len(pairs) - len(pairs) % group_size
+    grouped = pd.DataFrame(pairs[:usable].reshape(-1, group_size))
+    return pd.DataFrame({'text': join_columns(grouped, grouped.columns), 'label': 0})
+
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS, columns=None):
+    if path.lower().endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows, dtype=str, encoding='utf-8-sig', usecols=columns)
+
+
+def grouped_chunks(chunks, group_size=GROUP_SIZE):
+    # 청크 경계에서 잘린 그룹은 다음 청크 앞에 붙여 원본과 같은 묶음 단위를 유지
+    carry = None
+    for chunk in chunks:
+        chunk = chunk.dropna(subset=['req', 'res'])
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        usable = len(chunk) - len(chunk) % group_size
+        carry = chunk.iloc[usable:]
+        if usable:
+            yield chunk.iloc[:usable]
+
+
+class Deduplicator:
+    def __init__(self, near_threshold=NEAR_DUPLICATE):
+        self.near_threshold = near_threshold
+        self.seen = set()
+        self.signatures = []
+        self.buckets = {}
+        self.stats = {'rows': 0, 'kept': 0, 'exact': 0, 'near': 0}
+
+    def _is_near_duplicate(self, sig):
+        candidates = {i for key in band_keys(sig) for i in self.buckets.get(key, ())}
+        return any(np.count_nonzero(self.signatures[i] == sig) / NUM_PERM >= self.near_threshold
+                   for i in candidates)
+
+    def _keep(self, text):
+        digest = hashlib.blake2b(' '.join(text.split()).encode('utf-8'), digest_size=16).digest()
+        if digest in self.seen:
+            self.stats['exact'] += 1
+            return False
+        self.seen.add(digest)
+        if self.near_threshold:
+            sig = signature(text)
+            if self._is_near_duplicate(sig):
+                self.stats['near'] += 1
+                return False
+            for key in band_keys(sig):
+                self.buckets.setdefault(key, []).append(len(self.signatures))
+            self.signatures.append(sig)
+        return True
+
+    def filter(self, frame):
+        frame = frame[frame['text'].fillna('').str.strip() != '']
+        mask = [self._keep(text) for text in frame['text']]
+        self.stats['rows'] += len(frame)
+        self.stats['kept'] += sum(mask)
+        return frame[mask]
+
+
+class ChunkWriter:
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.lower().endswith('.parquet')
+        self.writer = None
+        self.rows = 0
+
+    def write(self, frame):
+        frame = frame.reset_index(drop=True).astype({'text': str, 'label': 'int64'})
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, table.schema, compression='zstd')
+            self.writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='a' if self.rows else 'w', header=not self.rows, index=False,
+                         encoding='utf-8-sig' if not self.rows else 'utf-8')
+        self.rows += len(frame)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def run(mode, inputs, output, chunk_rows=CHUNK_ROWS, near_threshold=NEAR_DUPLICATE, dedupe=True):
+    deduplicator = Deduplicator(near_threshold) if dedupe else None
+    writer = ChunkWriter(output)
+    try:
+        for path in inputs:
+            if mode == 'original':
+                frames = (process_original(chunk) for chunk in read_chunks(path, chunk_rows))
+            elif mode == 'good':
+                frames = (process_good(chunk) for chunk in grouped_chunks(read_chunks(path, chunk_rows)))
+            else:
+                frames = read_chunks(path, chunk_rows, columns=['text', 'label'])
+            for frame in frames:
+                frame = frame.assign(label=frame['label'].astype(int))
+                if deduplicator is not None:
+                    frame = deduplicator.filter(frame)
+                if len(frame):
+                    writer.write(frame)
+    finally:
+        writer.close()
+    return deduplicator.stats if deduplicator else {'rows': writer.rows, 'kept': writer.rows}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='2Racker 학습 데이터 전처리 (청크 단위 스트리밍, 중복 제거, parquet 출력)')
+    parser.add_argument('mode', choices=['original', 'good', 'merge'],
+                        help='original: conv1..conv13 대화 원본, good: req/res 정상 대화 원본, merge: text/label 데이터 병합')
+    parser.add_argument('inputs', nargs='+')
+    parser.add_argument('-o', '--output', required=True, help='.parquet 또는 .csv')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--near-threshold', type=float, default=NEAR_DUPLICATE,
+                        help='MinHash 유사도가 이 값 이상이면 중복으로 간주 (0이면 완전 일치만 제거)')
+    parser.add_argument('--no-dedupe', action='store_true')
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.output):
+        os.remove(args.output)
+    stats = run(args.mode, args.inputs, args.output, args.chunk_rows, args.near_threshold, not args.no_dedupe)
+    print(f"'{args.output}'로 저장됨: " + ', '.join(f'{k}={v}' for k, v in stats.items()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
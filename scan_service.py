@@ -0,0 +1,531 @@
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import logging
+import argparse
+import urllib.request
+from datetime import datetime
+from collections import defaultdict
+from contextlib import asynccontextmanager, nullcontext
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from telethon import events, errors
+
+from inference import InferenceEngine, SCAM_LABEL, label_for, chain_future
+from metrics import registry, start_server, METRICS_FILE
+from scan_state import ScanStateStore, SCAN_STATE_FILE
+from dialog_index import DialogIndex, DIALOG_INDEX_FILE
+from history_store import HistoryStore, HISTORY_DB
+from telegram_io import fetch_history, FETCH_CONCURRENCY, SESSION_NAME
+from template_index import TemplateIndex, TEMPLATE_INDEX_FILE, STRONG_MATCH
+from indicators import IndicatorMatcher, INDICATOR_FILE, STRONG_INDICATOR
+from scheduler import (ScanScheduler, CycleDeferred, MAX_FLOOD_RETRIES, REQUEST_RATE, REQUEST_BURST,
+                       CYCLE_TIME_BUDGET, CYCLE_INFERENCE_BUDGET)
+
+LEGACY_LOG_FILE = 'scan_log.json'
+SCAN_INTERVAL = 5
+TEMPLATE_BOOST = 0.3
+INDICATOR_BOOST = 0.2
+SWEEP_INTERVAL = 60
+PUSH_DEBOUNCE = 3
+PUSH_MAX_DELAY = 30
+# 동시에 모델에 넘기는 윈도우 수 상한: 가져오기가 추론보다 빨라도 대기 요청이 쌓이지 않음
+INFERENCE_SLOTS = 64
+# 토큰화와 추론 큐 넣기는 막힐 수 있으므로 이벤트 루프 대신 이 스레드들에서 실행
+SUBMIT_WORKERS = 4
+DATA_FILES = (SCAN_STATE_FILE, DIALOG_INDEX_FILE, HISTORY_DB, f'{HISTORY_DB}-wal', f'{HISTORY_DB}-shm',
+              TEMPLATE_INDEX_FILE, INDICATOR_FILE)
+
+logger = logging.getLogger('2racker.scan')
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def log_event(event, level=logging.INFO, **fields):
+    logger.log(level, event, extra={'fields': {'event': event, **fields}})
+
+
+class LogAlertSink:
+    def send(self, alert):
+        log_event('scam_detected', logging.WARNING, **alert)
+
+
+class WebhookAlertSink:
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alert):
+        body = json.dumps(alert, ensure_ascii=False).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+def build_alert_sinks(spec):
+    sinks = []
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        kind, _, target = item.partition(':')
+        if kind == 'log':
+            sinks.append(LogAlertSink())
+        elif kind == 'webhook' and target:
+            sinks.append(WebhookAlertSink(target))
+        else:
+            raise ValueError(f'unknown alert sink: {item}')
+    return sinks
+
+
+class WindowSlots:
+    # 긴 대화는 윈도우 수만큼 자리를 차지함 (상한보다 긴 대화도 비어 있을 때는 받음)
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.used = 0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def hold(self, count):
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self.used or self.used + count <= self.capacity)
+            self.used += count
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.used -= count
+                self._condition.notify_all()
+
+
+class ScanService:
+    def __init__(self, client, engine, data_dir='.', concurrency=FETCH_CONCURRENCY, alert_sinks=(),
+                 stage_hook=None, push=False, push_debounce=PUSH_DEBOUNCE, scheduler=None, template_seed=None,
+                 indicator_seed=None):
+        self.client = client
+        self.engine = engine
+        self.data_dir = data_dir
+        self.concurrency = concurrency
+        self.alert_sinks = list(alert_sinks)
+        self.stage_hook = stage_hook
+        self.scheduler = scheduler or ScanScheduler()
+        self.listeners = []
+        self.scanning = False
+        self.push_enabled = push
+        self.push_debounce = push_debounce
+        self._pending = {}
+        self._push_tasks = set()
+        self._chat_locks = defaultdict(asyncio.Lock)
+        self._inference_slots = WindowSlots(INFERENCE_SLOTS)
+        self._submitter = ThreadPoolExecutor(SUBMIT_WORKERS, thread_name_prefix='inference-submit')
+        self._inflight = {}
+        self._superseded = set()
+        self.state = ScanStateStore(os.path.join(data_dir, SCAN_STATE_FILE))
+        self.index = DialogIndex(os.path.join(data_dir, DIALOG_INDEX_FILE))
+        self.history = HistoryStore(os.path.join(data_dir, HISTORY_DB),
+                                    legacy_log=os.path.join(data_dir, LEGACY_LOG_FILE))
+        self.history.apply_retention()
+        self.templates = TemplateIndex(os.path.join(data_dir, TEMPLATE_INDEX_FILE), template_seed)
+        self.indicators = IndicatorMatcher(os.path.join(data_dir, INDICATOR_FILE), indicator_seed)
+        self.index.attach(client)
+        client.add_event_handler(self._on_new_message, events.NewMessage())
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def _notify(self, event, **payload):
+        for listener in self.listeners:
+            try:
+                listener(event, payload)
+            except Exception:
+                logger.exception('listener failed for %s', event)
+
+    def _stage(self, name, started):
+        seconds = time.perf_counter() - started
+        registry.observe('scan_stage_seconds', seconds, stage=name)
+        if self.stage_hook:
+            self.stage_hook(name, seconds)
+
+    async def _request(self, fn, *args, slot=None, budget=None):
+        bucket = self.scheduler.bucket
+        for attempt in range(MAX_FLOOD_RETRIES + 1):
+            # 주기 예산보다 오래 막혀 있으면 기다리지 않고 다음 주기로 미룸
+            if budget and budget.outlasts(bucket.blocked_for()):
+                raise CycleDeferred()
+            # FloodWait 대기는 동시 요청 자리를 잡기 전에 기다려 다른 채팅의 자리를 막지 않음
+            await bucket.wait_unblocked()
+            async with slot or nullcontext():
+                if budget and budget.expired():
+                    raise CycleDeferred()
+                await bucket.acquire()
+                try:
+                    return await fn(*args)
+                except errors.FloodWaitError as e:
+                    if attempt == MAX_FLOOD_RETRIES:
+                        raise
+                    log_event('flood_wait', logging.WARNING, seconds=e.seconds, attempt=attempt + 1)
+                    registry.inc('flood_waits_total')
+                    registry.inc('flood_wait_seconds_total', e.seconds)
+                    bucket.backoff(e.seconds)
+
+    async def refresh_dialogs(self):
+        started = time.perf_counter()
+        await self._request(self.index.refresh, self.client)
+        self._stage('dialog_refresh', started)
+        self._notify('dialogs_refreshed')
+
+    async def full_scan(self):
+        if self.scanning:
+            return None
+        self.scanning = True
+        try:
+            started = time.perf_counter()
+            await self.refresh_dialogs()
+            # 위험도·활동량·마지막 분석 시점 순으로 정렬하고, 예산을 넘긴 채팅은 다음 주기로 미룸
+            dialogs = self.scheduler.order(self.index.users(), self.state)
+            counts = await self.scan_dialogs(dialogs, self.scheduler.new_budget())
+            self.history.apply_retention()
+            self._stage('full_scan', started)
+            log_event('full_scan_finished', seconds=round(time.perf_counter() - started, 3), **counts)
+            return counts
+        finally:
+            self.scanning = False
+
+    async def scan_chat(self, peer_id):
+        dialog = self.index.get(peer_id)
+        if dialog is None:
+            return None
+        return await self.scan_dialogs([dialog])
+
+    async def scan_dialogs(self, dialogs, budget=None):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        counts = {'total': len(dialogs), 'scanned': 0, 'skipped': 0, 'deferred': 0, 'superseded': 0, 'errors': 0}
+        self._notify('scan_started', total=len(dialogs))
+
+        async def scan_one(dialog):
+            self._cancel_stale(dialog.id)
+            try:
+                async with self._chat_locks[dialog.id]:
+                    outcome = await self._scan_dialog(dialog, semaphore, budget)
+            except Exception as e:
+                outcome = 'errors'
+                log_event('scan_error', logging.ERROR, chat_id=dialog.id, error=str(e))
+                self._notify('error', chat_id=dialog.id, name=dialog.name, error=str(e))
+            counts[outcome] += 1
+            registry.inc('chats_total', outcome=outcome)
+            done = sum(counts.values()) - counts['total']
+            self._notify('progress', done=done, total=counts['total'])
+
+        await asyncio.gather(*(scan_one(dialog) for dialog in dialogs))
+        self.state.flush()
+        self._notify('scan_finished', **counts)
+        return counts
+
+    async def _scan_dialog(self, dialog, semaphore, budget=None):
+        last_seen = self.state.get(dialog.id).get('last_message_id')
+        if last_seen and dialog.latest_message_id <= last_seen:
+            self.state.mark_scanned(dialog.id)
+            self._notify('unchanged', chat_id=dialog.id, name=dialog.name)
+            return 'skipped'
+        started = time.perf_counter()
+        try:
+            messages = await self._request(fetch_history, self.client, dialog.entity, self.state.window_size,
+                                           self.state.last_message_id(dialog.id) or 0, slot=semaphore, budget=budget)
+        except CycleDeferred:
+            return 'deferred'
+        self._stage('fetch', started)
+        texts, last_id = self.state.merge_messages(dialog.id, messages)
+        if not texts:
+            # 미디어·서비스 메시지만 있는 채팅도 마지막 메시지 ID를 남겨 다음 주기에 다시 가져오지 않음
+            self.state.mark_scanned(dialog.id, last_id, dialog.name)
+            self._notify('unchanged', chat_id=dialog.id, name=dialog.name)
+            return 'skipped'
+        if self.state.is_unchanged(dialog.id, texts):
+            self.state.mark_scanned(dialog.id, last_id)
+            self._notify('unchanged', chat_id=dialog.id, name=dialog.name)
+            return 'skipped'
+
+        # 알려진 스캠 문구와 거의 같거나 강한 지표(지갑 주소, 스캠 도메인 등)가 있으면 모델을 건너뛰고, 약하면 점수를 올림
+        started = time.perf_counter()
+        template = self.templates.match_many(texts)
+        self._stage('template_match', started)
+        started = time.perf_counter()
+        hits = self.indicators.match_many(texts)
+        self._stage('indicator_match', started)
+        strongest = hits[0]['weight'] if hits else 0.0
+        for hit in hits:
+            registry.inc('indicator_hits_total', category=hit['category'])
+        if (template and template['similarity'] >= STRONG_MATCH) or strongest >= STRONG_INDICATOR:
+            score = max(template['similarity'] if template else 0.0, strongest)
+        else:
+            if budget and not budget.take_inference():
+                return 'deferred'
+            started = time.perf_counter()
+            try:
+                score = await self._infer(dialog.id, list(reversed(texts)))
+            except asyncio.CancelledError:
+                if dialog.id not in self._superseded:
+                    raise
+                # 같은 채팅의 새 분석이 들어와 이전 요청을 버림: 상태는 그대로 두고 새 분석이 이어서 처리
+                self._superseded.discard(dialog.id)
+                return 'superseded'
+            self._stage('inference', started)
+            if template:
+                score = min(1.0, score + TEMPLATE_BOOST * template['similarity'])
+            if hits:
+                score = min(1.0, score + INDICATOR_BOOST * strongest)
+
+        started = time.perf_counter()
+        label = label_for(score)
+        self.state.update(dialog.id, dialog.name, last_id, texts, label, score)
+        entry = {
+            'chat_id': dialog.id, 'user': dialog.name, 'result': label, 'score': score,
+            'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        if template:
+            entry['template'] = template['template_id']
+        if hits:
+            entry['indicators'] = [hit['id'] for hit in hits]
+        entry['id'] = self.history.append(entry)
+        self._stage('persist', started)
+        self._notify('result', entry=entry)
+        if label == SCAM_LABEL:
+            await self._alert(entry)
+        return 'scanned'
+
+    async def _infer(self, chat_id, messages):
+        loop = asyncio.get_running_loop()
+        # 토큰화 중이거나 자리를 기다리는 동안에도 새 분석이 이전 요청을 취소할 수 있도록 먼저 등록
+        future = Future()
+        self._inflight[chat_id] = future
+        try:
+            prob, windows = await loop.run_in_executor(self._submitter, self.engine.prepare_conversation, messages)
+            if future.cancelled():
+                raise asyncio.CancelledError()
+            if prob is not None:
+                return prob
+            async with self._inference_slots.hold(len(windows)):
+                if not future.cancelled():
+                    chain_future(await loop.run_in_executor(self._submitter, self.engine.submit_windows, windows),
+                                 future)
+                return await asyncio.wrap_future(future)
+        finally:
+            if self._inflight.get(chat_id) is future:
+                del self._inflight[chat_id]
+
+    def _cancel_stale(self, chat_id):
+        future = self._inflight.pop(chat_id, None)
+        if future is not None and future.cancel():
+            self._superseded.add(chat_id)
+            log_event('scan_superseded', chat_id=chat_id)
+
+    async def confirm_scam(self, chat_id):
+        # 사용자가 확인한 스캠 대화의 문구를 템플릿 색인에 추가
+        if chat_id not in self.state.windows:
+            dialog = self.index.get(chat_id)
+            entity = dialog.entity if dialog is not None else chat_id
+            messages = await self._request(fetch_history, self.client, entity, self.state.window_size)
+            self.state.merge_messages(chat_id, messages)
+        texts = [text for _, text in self.state.windows[chat_id] if text]
+        added = self.templates.add(texts, f'confirmed:{chat_id}')
+        log_event('scam_confirmed', chat_id=chat_id, templates_added=added, templates=len(self.templates))
+        return added
+
+    async def _on_new_message(self, event):
+        if not self.push_enabled:
+            return
+        entry = self.index.get(event.chat_id)
+        # 아직 목록에 없는 새 대화는 1:1 대화일 때만 분석
+        is_user = entry.is_user if entry is not None else getattr(event, 'is_private', False)
+        if is_user:
+            self._schedule_push(event.chat_id)
+
+    def _schedule_push(self, chat_id):
+        # 메시지가 연달아 오면 잠잠해질 때까지 기다렸다가 한 번만 분석하되, 최대 지연은 PUSH_MAX_DELAY로 제한
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        handle, first_seen = self._pending.get(chat_id, (None, now))
+        if handle is not None:
+            handle.cancel()
+        delay = min(self.push_debounce, max(0.0, first_seen + PUSH_MAX_DELAY - now))
+        self._pending[chat_id] = (loop.call_later(delay, self._start_push_scan, chat_id), first_seen)
+
+    def _start_push_scan(self, chat_id):
+        self._pending.pop(chat_id, None)
+        if not self.push_enabled:
+            return
+        task = asyncio.ensure_future(self._push_scan(chat_id))
+        self._push_tasks.add(task)
+        task.add_done_callback(self._push_tasks.discard)
+
+    async def _push_scan(self, chat_id):
+        try:
+            if self.index.get(chat_id) is None:
+                await self.refresh_dialogs()
+            dialog = self.index.get(chat_id)
+            if dialog is None or not dialog.is_user:
+                return
+            counts = await self.scan_dialogs([dialog])
+            log_event('push_scan_finished', chat_id=chat_id, **counts)
+        except Exception as e:
+            log_event('push_scan_failed', logging.ERROR, chat_id=chat_id, error=str(e))
+
+    async def _alert(self, entry):
+        loop = asyncio.get_running_loop()
+        for sink in self.alert_sinks:
+            try:
+                await loop.run_in_executor(None, sink.send, dict(entry))
+            except Exception:
+                logger.exception('alert sink %s failed', type(sink).__name__)
+
+    def close(self):
+        self.push_enabled = False
+        self._submitter.shutdown(wait=False, cancel_futures=True)
+        self.state.flush()
+        self.history.close()
+
+
+def configure_logging(json_logs=True, level=logging.INFO):
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter() if json_logs else logging.Formatter(
+        '%(asctime)s %(name)s %(levelname)s %(message)s'))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+
+
+async def open_account(session, data_dir, engine, args):
+    from telethon import TelegramClient
+    os.makedirs(data_dir, exist_ok=True)
+    client = TelegramClient(os.path.join(data_dir, session), int(os.getenv('api_id')), os.getenv('api_hash'))
+    await client.connect()
+    if not await client.is_user_authorized():
+        log_event('not_authorized', logging.ERROR, session=session)
+        await client.disconnect()
+        return None
+    # 계정마다 요청 한도와 분석 상태를 따로 둠
+    scheduler = ScanScheduler(args.rate, args.burst, args.time_budget, args.inference_budget)
+    return ScanService(client, engine, data_dir, args.concurrency, build_alert_sinks(args.alerts),
+                       push=not args.no_push, scheduler=scheduler,
+                       template_seed=os.path.join(args.model_path, TEMPLATE_INDEX_FILE),
+                       indicator_seed=os.path.join(args.model_path, INDICATOR_FILE))
+
+
+async def scan_account(session, service):
+    try:
+        await service.full_scan()
+    except Exception as e:
+        log_event('full_scan_failed', logging.ERROR, session=session, error=str(e))
+
+
+async def run_daemon(args, accounts=None):
+    from model_loader import load_model
+    from prefilter import load_prefilter
+
+    accounts = accounts or [(args.session, args.data_dir)]
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    def prefilter_loader():
+        return None if args.no_prefilter else load_prefilter(args.model_path, args.prefilter_threshold)
+
+    # 한 프로세스의 모든 계정이 모델 하나를 함께 사용
+    engine = InferenceEngine(lambda: load_model(args.model_path, backend=args.backend, threads=args.threads),
+                             prefilter_loader=prefilter_loader)
+    opened = await asyncio.gather(*(open_account(session, data_dir, engine, args) for session, data_dir in accounts),
+                                  return_exceptions=True)
+    # 한 계정의 연결 실패가 같은 프로세스의 다른 계정까지 멈추지 않도록 따로 처리
+    failures = [result for result in opened if isinstance(result, Exception)]
+    for (session, _), result in zip(accounts, opened):
+        if isinstance(result, Exception):
+            log_event('account_open_failed', logging.ERROR, session=session, error=str(result))
+    services = [(session, service) for (session, _), service in zip(accounts, opened)
+                if service is not None and not isinstance(service, Exception)]
+    if not services:
+        engine.close()
+        if failures:
+            raise failures[0]
+        return 1
+
+    interval = args.interval or (SCAN_INTERVAL if args.no_push else SWEEP_INTERVAL)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+    metrics_server = start_server(args.metrics_port) if args.metrics_port else None
+    metrics_file = os.path.join(args.data_dir, args.metrics_file) if args.metrics_file else None
+    log_event('daemon_started', sessions=[session for session, _ in services], interval_minutes=interval,
+              push=not args.no_push, metrics_port=args.metrics_port)
+    try:
+        while not stop.is_set():
+            await asyncio.gather(*(scan_account(session, service) for session, service in services))
+            if metrics_file:
+                try:
+                    registry.export(metrics_file)
+                except Exception as e:
+                    log_event('metrics_export_failed', logging.WARNING, error=str(e))
+            try:
+                await asyncio.wait_for(stop.wait(), interval * 60)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        for _, service in services:
+            service.close()
+        engine.close()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        for _, service in services:
+            await service.client.disconnect()
+        log_event('daemon_stopped')
+    return 0
+
+
+def main(argv=None):
+    from model_loader import MODEL_PATH, BACKEND, INFERENCE_THREADS
+    parser = argparse.ArgumentParser(description='2Racker 로맨스 스캠 탐지 헤드리스 서비스')
+    parser.add_argument('--session', default=SESSION_NAME)
+    parser.add_argument('--data-dir', default='.')
+    parser.add_argument('--interval', type=float, default=0,
+                        help=f'전체 점검 주기 (분, 기본값: 실시간 감지 시 {SWEEP_INTERVAL}, 아니면 {SCAN_INTERVAL})')
+    parser.add_argument('--no-push', action='store_true', help='새 메시지 이벤트 기반 실시간 감지 끄기')
+    parser.add_argument('--concurrency', type=int, default=FETCH_CONCURRENCY)
+    parser.add_argument('--rate', type=float, default=REQUEST_RATE, help='초당 Telegram 요청 수 (0이면 제한 없음)')
+    parser.add_argument('--burst', type=int, default=REQUEST_BURST)
+    parser.add_argument('--time-budget', type=float, default=CYCLE_TIME_BUDGET, help='주기당 최대 분석 시간 (초)')
+    parser.add_argument('--inference-budget', type=int, default=CYCLE_INFERENCE_BUDGET,
+                        help='주기당 최대 모델 추론 채팅 수')
+    parser.add_argument('--model-path', default=MODEL_PATH)
+    parser.add_argument('--backend', default=os.getenv('model_backend', BACKEND))
+    parser.add_argument('--threads', type=int, default=int(os.getenv('inference_threads', INFERENCE_THREADS)),
+                        help='모델 추론에 쓰는 CPU 스레드 수')
+    parser.add_argument('--prefilter-threshold', type=float, default=None,
+                        help='전 단계 필터 임계값 (기본값: prefilter_report.json의 권장값)')
+    parser.add_argument('--no-prefilter', action='store_true')
+    parser.add_argument('--alerts', default=os.getenv('alert_sinks', 'log'),
+                        help='쉼표로 구분한 알림 대상 (log, webhook:URL)')
+    parser.add_argument('--metrics-port', type=int, default=int(os.getenv('metrics_port') or 0),
+                        help='127.0.0.1에서 /metrics (Prometheus 텍스트 형식) 제공 포트 (0이면 끔)')
+    parser.add_argument('--metrics-file', default=os.getenv('metrics_file', METRICS_FILE),
+                        help='전체 점검마다 지표를 기록할 파일 (빈 값이면 끔)')
+    parser.add_argument('--plain-logs', action='store_true')
+    args = parser.parse_args(argv)
+    configure_logging(json_logs=not args.plain_logs)
+    return asyncio.run(run_daemon(args))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+import os
+import json
+import time
+import hashlib
+from datetime import datetime
+
+SCAN_STATE_FILE = 'scan_state.json'
+WINDOW_SIZE = 50
+
+
+def window_hash(texts):
+    return hashlib.sha256('\x1e'.join(texts).encode('utf-8')).hexdigest()
+
+
+class ScanStateStore:
+    def __init__(self, path=SCAN_STATE_FILE, window_size=WINDOW_SIZE):
+        self.path = path
+        self.window_size = window_size
+        self.states = self._load()
+        self.dirty = False
+        # 메시지 본문은 디스크에 남기지 않고 메모리에만 보관
+        self.windows = {}
+
+    def _load(self):
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return {int(k): v for k, v in json.load(f).items()}
+        return {}
+
+    def save(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({str(k): v for k, v in self.states.items()}, f, indent=2, ensure_ascii=False)
+        self.dirty = False
+
+    def flush(self):
+        if self.dirty:
+            self.save()
+
+    def get(self, dialog_id):
+        return self.states.get(dialog_id, {})
+
+    def last_message_id(self, dialog_id):
+        if dialog_id not in self.windows:
+            return None
+        return self.get(dialog_id).get('last_message_id')
+
+    def merge_messages(self, dialog_id, messages):
+        merged = {msg_id: text for msg_id, text in self.windows.get(dialog_id, [])}
+        merged.update(messages)
+        window = sorted(merged.items(), key=lambda m: m[0], reverse=True)[:self.window_size]
+        self.windows[dialog_id] = window
+        texts = [text for _, text in window if text]
+        last_id = window[0][0] if window else 0
+        return texts, last_id
+
+    def is_unchanged(self, dialog_id, texts):
+        return self.get(dialog_id).get('window_hash') == window_hash(texts)
+
+    def mark_scanned(self, dialog_id, last_message_id=None, name=None):
+        if name is not None:
+            # 분석한 적 없는 채팅도 마지막 메시지 ID는 남김 (결과·점수 없이)
+            self.states.setdefault(dialog_id, {'name': name})
+        if dialog_id in self.states:
+            if last_message_id:
+                self.states[dialog_id]['last_message_id'] = last_message_id
+            self.states[dialog_id]['time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            self.states[dialog_id]['scanned_at'] = time.time()
+            self.dirty = True
+
+    def update(self, dialog_id, name, last_message_id, texts, label, score=None):
+        self.states[dialog_id] = {
+            'name': name,
+            'last_message_id': last_message_id,
+            'window_hash': window_hash(texts),
+            'result': label,
+            'score': score,
+            'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'scanned_at': time.time(),
+        }
+        self.dirty = True
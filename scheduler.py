@@ -0,0 +1,107 @@
+import time
+import heapq
+import asyncio
+
+REQUEST_RATE = 20
+REQUEST_BURST = 40
+CYCLE_TIME_BUDGET = 10 * 60
+CYCLE_INFERENCE_BUDGET = 2000
+MAX_FLOOD_RETRIES = 3
+
+ACTIVITY_WEIGHT = 2.0
+RISK_WEIGHT = 1.5
+AGE_WEIGHT = 1.0
+STALE_AFTER = 24 * 60 * 60
+UNKNOWN_RISK = 0.5
+
+
+class CycleDeferred(Exception):
+    def __init__(self):
+        super().__init__('이번 주기 예산을 넘겨 다음 주기로 미룸')
+
+
+class TokenBucket:
+    def __init__(self, rate=REQUEST_RATE, capacity=REQUEST_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def blocked_for(self):
+        return max(0.0, self.blocked_until - time.monotonic())
+
+    async def wait_unblocked(self):
+        while self.blocked_for() > 0:
+            await asyncio.sleep(self.blocked_for())
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                await self.wait_unblocked()
+                continue
+            if not self.rate:
+                return
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def backoff(self, seconds):
+        # FloodWait는 계정 전체에 걸리므로 모든 요청을 지정된 시간 동안 멈춤
+        now = time.monotonic()
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self._refill(now)
+        self.tokens = 0
+
+
+class CycleBudget:
+    def __init__(self, seconds=CYCLE_TIME_BUDGET, inferences=CYCLE_INFERENCE_BUDGET):
+        self.deadline = time.monotonic() + seconds if seconds else None
+        self.inferences = inferences or None
+
+    def expired(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def outlasts(self, seconds):
+        return self.deadline is not None and time.monotonic() + seconds >= self.deadline
+
+    def take_inference(self):
+        if self.inferences is None:
+            return True
+        if self.inferences <= 0:
+            return False
+        self.inferences -= 1
+        return True
+
+
+def chat_priority(dialog, state, now):
+    if not state:
+        return ACTIVITY_WEIGHT + RISK_WEIGHT * UNKNOWN_RISK + AGE_WEIGHT
+    active = dialog.latest_message_id > (state.get('last_message_id') or 0)
+    risk = state.get('score', UNKNOWN_RISK)
+    age = min(1.0, (now - state.get('scanned_at', 0)) / STALE_AFTER)
+    return ACTIVITY_WEIGHT * active + RISK_WEIGHT * risk + AGE_WEIGHT * age
+
+
+class ScanScheduler:
+    def __init__(self, rate=REQUEST_RATE, burst=REQUEST_BURST, time_budget=CYCLE_TIME_BUDGET,
+                 inference_budget=CYCLE_INFERENCE_BUDGET):
+        self.bucket = TokenBucket(rate, burst)
+        self.time_budget = time_budget
+        self.inference_budget = inference_budget
+
+    def order(self, dialogs, state_store):
+        now = time.time()
+        heap = [(-chat_priority(d, state_store.get(d.id), now), i, d) for i, d in enumerate(dialogs)]
+        heapq.heapify(heap)
+        return [heapq.heappop(heap)[2] for _ in range(len(heap))]
+
+    def new_budget(self):
+        return CycleBudget(self.time_budget, self.inference_budget)
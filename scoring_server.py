@@ -0,0 +1,265 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from inference import InferenceEngine, MESSAGE_SEP, split_messages, label_for, chain_future
+from metrics import registry
+
+SCORING_HOST = '127.0.0.1'
+SCORING_PORT = 8765
+MAX_PENDING = 256
+MAX_TEXTS_PER_REQUEST = 256
+MAX_BODY_BYTES = 16 * 1024 * 1024
+REQUEST_TIMEOUT = 60
+RETRY_AFTER = 1
+CLIENT_RETRIES = 5
+CLIENT_WORKERS = 8
+
+logger = logging.getLogger('2racker.scoring')
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after=RETRY_AFTER):
+        super().__init__(f'채점 서버 과부하: {retry_after}초 후 다시 시도하세요')
+        self.retry_after = retry_after
+
+
+class ScoringService:
+    def __init__(self, engine, max_pending=MAX_PENDING, timeout=REQUEST_TIMEOUT):
+        self.engine = engine
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self._lock = threading.Lock()
+        registry.gauge('scoring_pending', lambda: self.pending)
+
+    def score(self, texts):
+        # 대기 중인 대화 수가 상한을 넘으면 큐에 쌓지 않고 바로 거절 (상한보다 큰 요청도 비어 있을 때는 받음)
+        with self._lock:
+            if self.pending and self.pending + len(texts) > self.max_pending:
+                raise Overloaded()
+            self.pending += len(texts)
+        try:
+            # 동시에 들어온 요청들은 추론 엔진에서 한 배치로 묶여 처리됨
+            futures = [self.engine.submit_conversation(split_messages(text)) for text in texts]
+            deadline = time.monotonic() + self.timeout
+            try:
+                return [future.result(max(0.0, deadline - time.monotonic())) for future in futures]
+            except TimeoutError:
+                for future in futures:
+                    future.cancel()
+                raise
+        finally:
+            with self._lock:
+                self.pending -= len(texts)
+
+    def health(self):
+        return {
+            'ready': self.engine.ready.is_set() and self.engine.load_error is None,
+            'error': str(self.engine.load_error) if self.engine.load_error else None,
+            'backend': getattr(self.engine.model, 'name', None),
+            'pending': self.pending,
+            'max_pending': self.max_pending,
+        }
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, payload, headers=()):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+            registry.inc('scoring_requests_total', status=status)
+
+        def do_GET(self):
+            path = self.path.split('?')[0]
+            if path == '/health':
+                health = service.health()
+                self._reply(200 if health['ready'] else 503, health)
+            elif path == '/metrics':
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self._reply(404, {'error': 'not_found'})
+
+        def do_POST(self):
+            if self.path.split('?')[0] != '/score':
+                self._reply(404, {'error': 'not_found'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                if length > MAX_BODY_BYTES:
+                    self._reply(413, {'error': 'request_too_large', 'max_bytes': MAX_BODY_BYTES})
+                    return
+                request = json.loads(self.rfile.read(length) or b'{}')
+                if 'texts' in request:
+                    texts = request['texts']
+                    # 문자열을 그대로 받으면 글자 하나하나를 대화로 채점하게 됨
+                    if not isinstance(texts, list):
+                        raise ValueError('texts는 문자열 목록이어야 합니다')
+                else:
+                    texts = [request['text']]
+                if not all(isinstance(text, str) for text in texts):
+                    raise ValueError('text와 texts 항목은 문자열이어야 합니다')
+            except Exception as e:
+                self._reply(400, {'error': 'bad_request', 'detail': f'{{"texts": [...]}} 형식이어야 합니다 ({e})'})
+                return
+            if len(texts) > MAX_TEXTS_PER_REQUEST:
+                self._reply(413, {'error': 'too_many_texts', 'max_texts': MAX_TEXTS_PER_REQUEST})
+                return
+
+            started = time.perf_counter()
+            try:
+                probs = service.score(texts)
+            except Overloaded as e:
+                self._reply(503, {'error': 'overloaded', 'retry_after': e.retry_after,
+                                  'pending': service.pending, 'max_pending': service.max_pending},
+                            [('Retry-After', str(e.retry_after))])
+                return
+            except TimeoutError:
+                self._reply(504, {'error': 'timeout', 'timeout': service.timeout})
+                return
+            except Exception as e:
+                logger.exception('scoring failed')
+                self._reply(500, {'error': 'scoring_failed', 'detail': str(e)})
+                return
+            registry.observe('scan_stage_seconds', time.perf_counter() - started, stage='scoring_request')
+            self._reply(200, {'results': [{'probability': prob, 'label': label_for(prob)} for prob in probs]})
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    return Handler
+
+
+class ScoringHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # 기본 backlog(5)로는 동시 접속이 몰릴 때 과부하 응답 대신 연결이 끊김
+    request_queue_size = 128
+
+
+def serve(service, host=SCORING_HOST, port=SCORING_PORT):
+    return ScoringHTTPServer((host, port), make_handler(service))
+
+
+class ScoringClient:
+    # InferenceEngine과 같은 방식으로 쓸 수 있는 원격 채점 클라이언트 (ScanService, main.py에서 그대로 사용)
+    def __init__(self, url, timeout=REQUEST_TIMEOUT, retries=CLIENT_RETRIES, workers=CLIENT_WORKERS):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+        self.ready = threading.Event()
+        self.ready.set()
+        self.load_error = None
+        self.prefiltered = 0
+        self.forwarded = 0
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='scoring-client')
+
+    def _post(self, texts):
+        request = urllib.request.Request(f'{self.url}/score', json.dumps({'texts': texts}).encode('utf-8'),
+                                         {'Content-Type': 'application/json'})
+        for attempt in range(self.retries + 1):
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.loads(response.read())['results']
+            except urllib.error.HTTPError as e:
+                detail = json.loads(e.read() or b'{}')
+                if e.code != 503 or detail.get('error') != 'overloaded':
+                    raise RuntimeError(f"채점 서버 오류 {e.code}: {detail.get('detail') or detail.get('error')}")
+                if attempt == self.retries:
+                    raise Overloaded(detail.get('retry_after', RETRY_AFTER))
+                time.sleep(float(e.headers.get('Retry-After') or RETRY_AFTER))
+
+    def score_many(self, texts):
+        probs = []
+        for start in range(0, len(texts), MAX_TEXTS_PER_REQUEST):
+            probs.extend(result['probability'] for result in self._post(texts[start:start + MAX_TEXTS_PER_REQUEST]))
+        return probs
+
+    def start(self):
+        pass
+
+    def submit(self, text):
+        return self._executor.submit(lambda: self.score_many([text])[0])
+
+    def submit_conversation(self, messages):
+        future = Future()
+        chain_future(self.submit(MESSAGE_SEP.join(messages)), future)
+        return future
+
+    def prepare_conversation(self, messages):
+        # 윈도우 분할은 서버에서 하므로 대화 하나를 윈도우 하나로 셈
+        return None, [MESSAGE_SEP.join(messages)]
+
+    def submit_windows(self, windows):
+        future = Future()
+        chain_future(self.submit(windows[0]), future)
+        return future
+
+    def predict(self, text):
+        return self.submit(text).result()
+
+    def predict_many(self, texts):
+        return self.score_many(list(texts))
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main(argv=None):
+    from model_loader import load_model, MODEL_PATH, BACKEND, INFERENCE_THREADS
+    from prefilter import load_prefilter
+    parser = argparse.ArgumentParser(description='2Racker 로컬 채점 서버: 모델 하나를 여러 프로세스가 함께 사용')
+    parser.add_argument('--host', default=SCORING_HOST)
+    parser.add_argument('--port', type=int, default=int(os.getenv('scoring_port') or SCORING_PORT))
+    parser.add_argument('--model-path', default=MODEL_PATH)
+    parser.add_argument('--backend', default=os.getenv('model_backend', BACKEND))
+    parser.add_argument('--threads', type=int, default=int(os.getenv('inference_threads', INFERENCE_THREADS)))
+    parser.add_argument('--max-pending', type=int, default=MAX_PENDING,
+                        help='동시에 처리 중인 대화 수 상한 (넘으면 503 overloaded 응답)')
+    parser.add_argument('--timeout', type=float, default=REQUEST_TIMEOUT)
+    parser.add_argument('--prefilter-threshold', type=float, default=None)
+    parser.add_argument('--no-prefilter', action='store_true')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+
+    def prefilter_loader():
+        return None if args.no_prefilter else load_prefilter(args.model_path, args.prefilter_threshold)
+
+    engine = InferenceEngine(lambda: load_model(args.model_path, backend=args.backend, threads=args.threads),
+                             prefilter_loader=prefilter_loader)
+    engine.ready.wait()
+    if engine.load_error:
+        logger.error('모델 로딩 실패: %s', engine.load_error)
+        return 1
+    server = serve(ScoringService(engine, args.max_pending, args.timeout), args.host, args.port)
+    logger.info('채점 서버 시작: http://%s:%d/score', args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        engine.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
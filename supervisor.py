@@ -0,0 +1,159 @@
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import logging
+import argparse
+import multiprocessing
+from copy import copy
+
+from scan_service import run_daemon, configure_logging, log_event, FETCH_CONCURRENCY, SCAN_INTERVAL, SWEEP_INTERVAL
+from scheduler import REQUEST_RATE, REQUEST_BURST, CYCLE_TIME_BUDGET, CYCLE_INFERENCE_BUDGET
+from metrics import METRICS_FILE
+
+ACCOUNTS_FILE = 'accounts.json'
+ACCOUNTS_DIR = 'accounts'
+SHARED_BACKEND = 'mmap'
+RESTART_DELAY = 5
+MAX_RESTART_DELAY = 300
+STOP_TIMEOUT = 30
+# 로그인된 계정이 하나도 없어 종료한 워커는 다시 띄워도 소용없으므로 재시작하지 않음
+EXIT_NO_ACCOUNTS = 3
+
+
+def load_accounts(path):
+    # ["세션명", ...] 또는 [{"session": "세션명"}, ...]
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    sessions = [entry if isinstance(entry, str) else entry['session'] for entry in entries]
+    if len(set(sessions)) != len(sessions):
+        raise ValueError(f'{path}에 중복된 세션이 있습니다')
+    return sorted(sessions)
+
+
+def shard_accounts(sessions, workers):
+    # 계정 목록이 같으면 항상 같은 워커에 배정되도록 정렬된 순서로 나눔
+    shards = [sessions[i::workers] for i in range(workers)]
+    return [shard for shard in shards if shard]
+
+
+def run_worker(index, sessions, args):
+    configure_logging(json_logs=not args.plain_logs)
+    worker_args = copy(args)
+    worker_args.metrics_file = f'worker-{index}.prom' if args.metrics_file else None
+    worker_args.metrics_port = args.metrics_port + index if args.metrics_port else 0
+    accounts = [(session, os.path.join(args.data_dir, session)) for session in sessions]
+    log_event('worker_started', worker=index, sessions=sessions, pid=os.getpid())
+    sys.exit(EXIT_NO_ACCOUNTS if asyncio.run(run_daemon(worker_args, accounts)) else 0)
+
+
+class Supervisor:
+    def __init__(self, shards, args):
+        self.shards = shards
+        self.args = args
+        self.context = multiprocessing.get_context('spawn')
+        self.workers = {}
+        self.restarts = {index: 0 for index in range(len(shards))}
+        self.stopping = False
+
+    def _spawn(self, index):
+        process = self.context.Process(target=run_worker, args=(index, self.shards[index], self.args),
+                                       name=f'scan-worker-{index}')
+        process.start()
+        self.workers[index] = (process, time.monotonic())
+
+    def run(self):
+        for index in range(len(self.shards)):
+            self._spawn(index)
+        pending = {}
+        while not self.stopping:
+            time.sleep(1)
+            for index, (process, started) in list(self.workers.items()):
+                if process.is_alive() or index in pending:
+                    continue
+                if process.exitcode in (0, EXIT_NO_ACCOUNTS):
+                    log_event('worker_finished', worker=index, exitcode=process.exitcode)
+                    del self.workers[index]
+                    continue
+                # 오래 버틴 워커는 재시작 간격을 처음부터 다시 셈
+                if time.monotonic() - started > MAX_RESTART_DELAY:
+                    self.restarts[index] = 0
+                delay = min(MAX_RESTART_DELAY, RESTART_DELAY * 2 ** self.restarts[index])
+                self.restarts[index] += 1
+                log_event('worker_exited', logging.ERROR, worker=index, exitcode=process.exitcode,
+                          restart_in=delay)
+                pending[index] = time.monotonic() + delay
+            for index, due in list(pending.items()):
+                if time.monotonic() >= due:
+                    del pending[index]
+                    self._spawn(index)
+            if not self.workers:
+                return 1
+        return 0
+
+    def stop(self, *_):
+        self.stopping = True
+
+    def shutdown(self):
+        for process, _ in self.workers.values():
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + STOP_TIMEOUT
+        for process, _ in self.workers.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+        log_event('supervisor_stopped')
+
+
+def main(argv=None):
+    from model_loader import MODEL_PATH
+    parser = argparse.ArgumentParser(description='2Racker 다중 계정 감시: 계정을 워커 프로세스에 나눠 배정하고 모델 가중치는 공유')
+    parser.add_argument('--accounts', default=ACCOUNTS_FILE, help='세션 이름 목록 JSON 파일')
+    parser.add_argument('--data-dir', default=ACCOUNTS_DIR, help='계정별 세션·분석 상태를 둘 상위 폴더')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--interval', type=float, default=0,
+                        help=f'전체 점검 주기 (분, 기본값: 실시간 감지 시 {SWEEP_INTERVAL}, 아니면 {SCAN_INTERVAL})')
+    parser.add_argument('--no-push', action='store_true')
+    parser.add_argument('--concurrency', type=int, default=FETCH_CONCURRENCY)
+    parser.add_argument('--rate', type=float, default=REQUEST_RATE, help='계정당 초당 Telegram 요청 수')
+    parser.add_argument('--burst', type=int, default=REQUEST_BURST)
+    parser.add_argument('--time-budget', type=float, default=CYCLE_TIME_BUDGET)
+    parser.add_argument('--inference-budget', type=int, default=CYCLE_INFERENCE_BUDGET)
+    parser.add_argument('--model-path', default=MODEL_PATH)
+    parser.add_argument('--backend', default=os.getenv('model_backend', SHARED_BACKEND),
+                        help='mmap: 모든 워커가 model.safetensors 하나를 메모리 매핑해 공유')
+    parser.add_argument('--threads', type=int, default=0, help='워커당 추론 스레드 수 (0이면 코어 수 / 워커 수)')
+    parser.add_argument('--prefilter-threshold', type=float, default=None)
+    parser.add_argument('--no-prefilter', action='store_true')
+    parser.add_argument('--alerts', default=os.getenv('alert_sinks', 'log'))
+    parser.add_argument('--metrics-port', type=int, default=int(os.getenv('metrics_port') or 0),
+                        help='첫 워커의 /metrics 포트 (워커 i는 포트+i, 0이면 끔)')
+    parser.add_argument('--metrics-file', default=METRICS_FILE, help='빈 값이면 워커별 지표 파일을 쓰지 않음')
+    parser.add_argument('--plain-logs', action='store_true')
+    args = parser.parse_args(argv)
+    configure_logging(json_logs=not args.plain_logs)
+
+    sessions = load_accounts(args.accounts)
+    shards = shard_accounts(sessions, args.workers)
+    if not shards:
+        log_event('no_accounts', logging.ERROR, accounts=args.accounts)
+        return 1
+    args.threads = args.threads or max(1, (os.cpu_count() or 1) // len(shards))
+    log_event('supervisor_started', accounts=len(sessions), workers=len(shards), backend=args.backend)
+
+    supervisor = Supervisor(shards, args)
+    signal.signal(signal.SIGTERM, supervisor.stop)
+    try:
+        return supervisor.run()
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        supervisor.shutdown()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+from telethon import TelegramClient
+
+SESSION_NAME = 'scamdetect_session'
+FETCH_CONCURRENCY = 8
+
+
+class TelegramRunner:
+    def __init__(self, session, api_id, api_hash):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name='telegram-io', daemon=True)
+        self._thread.start()
+        self.client = asyncio.run_coroutine_threadsafe(
+            self._create_client(session, api_id, api_hash), self.loop
+        ).result()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _create_client(self, session, api_id, api_hash):
+        self._connect_lock = asyncio.Lock()
+        return TelegramClient(session, api_id, api_hash)
+
+    async def _when_connected(self, coro):
+        try:
+            async with self._connect_lock:
+                if not self.client.is_connected():
+                    await self.client.connect()
+        except Exception:
+            coro.close()
+            raise
+        return await coro
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(self._when_connected(coro), self.loop)
+
+    def call(self, coro, timeout=None):
+        return self.submit(coro).result(timeout)
+
+    def close(self):
+        try:
+            asyncio.run_coroutine_threadsafe(self.client.disconnect(), self.loop).result(10)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=10)
+
+
+async def fetch_history(client, entity, limit, min_id=0):
+    messages = []
+    async for msg in client.iter_messages(entity, limit=limit, min_id=min_id):
+        messages.append((msg.id, msg.text.strip() if msg.text else ''))
+    return messages
+
+
+async def fetch_account(client):
+    if not await client.is_user_authorized():
+        return None
+    return await client.get_me()
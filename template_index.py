@@ -0,0 +1,169 @@
+import os
+import sys
+import csv
+import json
+import zlib
+import argparse
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from inference import split_messages
+
+TEMPLATE_INDEX_FILE = 'scam_templates.jsonl'
+NUM_PERM = 64
+BANDS = 16
+SHINGLE_SIZE = 4
+MIN_CHARS = 12
+MATCH_THRESHOLD = 0.5
+STRONG_MATCH = 0.8
+SEED = 42
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_rng = np.random.RandomState(SEED)
+_A = _rng.randint(1, 1 << 31, NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, 1 << 31, NUM_PERM).astype(np.uint64)
+
+
+def normalize(text):
+    return ''.join(text.lower().split())
+
+
+def shingles(text):
+    text = normalize(text)
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def signature(text):
+    hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles(text)), dtype=np.uint64)
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _MERSENNE).min(axis=1).astype(np.uint32)
+
+
+def band_keys(sig):
+    rows = NUM_PERM // BANDS
+    return [(band, sig[band * rows:(band + 1) * rows].tobytes()) for band in range(BANDS)]
+
+
+class TemplateIndex:
+    def __init__(self, path=TEMPLATE_INDEX_FILE, seed_path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self.templates = []
+        self.signatures = []
+        self.buckets = {}
+        # 모델과 함께 배포된 기본 템플릿은 읽기만 하고, 새로 확정된 문구는 path에만 추가
+        for source in (seed_path, path):
+            if source and os.path.exists(source):
+                self._load(source)
+
+    def _load(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._insert(entry, np.array(entry.pop('signature'), dtype=np.uint32))
+
+    def __len__(self):
+        return len(self.templates)
+
+    def _insert(self, entry, sig):
+        template_id = len(self.templates)
+        self.templates.append(entry)
+        self.signatures.append(sig)
+        for key in band_keys(sig):
+            self.buckets.setdefault(key, []).append(template_id)
+        return template_id
+
+    def _best(self, sig):
+        candidates = {t for key in band_keys(sig) for t in self.buckets.get(key, ())}
+        best_id, best_sim = None, 0.0
+        for template_id in candidates:
+            sim = float(np.count_nonzero(self.signatures[template_id] == sig)) / NUM_PERM
+            if sim > best_sim:
+                best_id, best_sim = template_id, sim
+        return best_id, best_sim
+
+    def match(self, text, threshold=MATCH_THRESHOLD):
+        if len(normalize(text)) < MIN_CHARS:
+            return None
+        with self._lock:
+            template_id, sim = self._best(signature(text))
+            if template_id is None or sim < threshold:
+                return None
+            return {'template_id': template_id, 'similarity': sim, 'text': self.templates[template_id]['text']}
+
+    def match_many(self, texts, threshold=MATCH_THRESHOLD):
+        best = None
+        for text in texts:
+            found = self.match(text, threshold)
+            if found and (best is None or found['similarity'] > best['similarity']):
+                best = found
+        return best
+
+    def add(self, texts, source, save=True):
+        # 이미 등록된 문구와 거의 같으면 새로 추가하지 않음
+        added = []
+        with self._lock:
+            for text in texts:
+                if len(normalize(text)) < MIN_CHARS:
+                    continue
+                sig = signature(text)
+                if self._best(sig)[1] >= STRONG_MATCH:
+                    continue
+                entry = {'text': text, 'source': source, 'added': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+                self._insert(entry, sig)
+                added.append((entry, sig))
+            if save and added and self.path:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    for entry, sig in added:
+                        f.write(json.dumps({**entry, 'signature': sig.tolist()}, ensure_ascii=False) + '\n')
+        return len(added)
+
+
+def read_dataset(path):
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            yield split_messages(row.get('text')), str(row.get('label')).strip() == '1'
+
+
+def build(paths, output):
+    if os.path.exists(output):
+        os.remove(output)
+    index = TemplateIndex(output)
+    benign = TemplateIndex(None)
+    source = ','.join(os.path.basename(path) for path in paths)
+    conversations = [c for path in paths for c in read_dataset(path)]
+    for messages, is_scam in conversations:
+        if not is_scam:
+            benign.add(messages, 'benign', save=False)
+    # 정상 대화에도 나오는 인사말 등은 템플릿에서 제외
+    for messages, is_scam in conversations:
+        if is_scam:
+            index.add([m for m in messages if not benign.match(m, STRONG_MATCH)], source)
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='2Racker 스캠 문구 템플릿 색인 (MinHash/LSH 유사 문장 탐색)')
+    parser.add_argument('--index', default=TEMPLATE_INDEX_FILE)
+    sub = parser.add_subparsers(dest='command', required=True)
+    build_parser = sub.add_parser('build', help='라벨된 데이터셋의 스캠 대화로 색인을 새로 생성')
+    build_parser.add_argument('datasets', nargs='+')
+    match_parser = sub.add_parser('match', help='문장과 가장 비슷한 템플릿 조회')
+    match_parser.add_argument('text')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        index = build(args.datasets, args.index)
+        print(f'템플릿 {len(index)}개 저장: {args.index}')
+    else:
+        found = TemplateIndex(args.index).match(args.text)
+        print(json.dumps(found, ensure_ascii=False) if found else '일치하는 템플릿 없음')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from dialog_index import DialogIndex
+
+
+class Client:
+    def __init__(self):
+        self.count = 0
+
+    async def iter_dialogs(self):
+        # 호출할 때마다 새 대화가 늘어나는 계정
+        self.count += 200
+        for peer_id in range(self.count, 0, -1):
+            yield SimpleNamespace(id=peer_id, name=f'user{peer_id}', is_user=True, pinned=False,
+                                  message=SimpleNamespace(id=peer_id), input_entity=peer_id)
+
+
+def test_users_sorted_by_latest_message(tmp_path):
+    index = DialogIndex(str(tmp_path / 'dialog_index.json'))
+    asyncio.run(index.refresh(Client()))
+    users = index.users()
+    assert [entry.id for entry in users[:3]] == [200, 199, 198]
+    assert DialogIndex(str(tmp_path / 'dialog_index.json')).get(5).name == 'user5'
+
+
+def test_users_while_refreshing(tmp_path):
+    index = DialogIndex(str(tmp_path / 'dialog_index.json'))
+    client = Client()
+    stop = threading.Event()
+    errors = []
+
+    def read():
+        while not stop.is_set():
+            try:
+                index.users()
+            except Exception as e:
+                errors.append(e)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+
+    async def refresh():
+        for _ in range(12):
+            await index.refresh(client, full=True)
+            await index.refresh(client)
+
+    try:
+        asyncio.run(refresh())
+    finally:
+        stop.set()
+        reader.join()
+    assert not errors
+    assert len(index.users()) == client.count
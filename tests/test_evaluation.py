@@ -0,0 +1,39 @@
+import csv
+
+from evaluation import load_splits, load_holdout
+from train import load_tokenized
+
+
+def write_dataset(path, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['text', 'label'])
+        writer.writerows(rows)
+
+
+class Tokenizer:
+    name_or_path = 'fake'
+
+    def __call__(self, texts, truncation=False, max_length=None):
+        # 실제 토크나이저처럼 문자열이 아니면 실패
+        for text in texts:
+            if not isinstance(text, str):
+                raise TypeError('text input must be of type str')
+        return {'input_ids': [[1] * len(text) for text in texts]}
+
+
+def test_load_splits_drops_empty_rows(tmp_path):
+    path = str(tmp_path / 'set.csv')
+    write_dataset(path, [[f'대화 {i}', i % 2] for i in range(8)] + [['', 0], ['   ', 1]])
+    splits = load_splits(path)
+    texts = list(splits['train']['text']) + list(splits['test']['text'])
+    assert sorted(texts) == sorted(f'대화 {i}' for i in range(8))
+    assert all(isinstance(text, str) for text in load_holdout(path)[0])
+
+
+def test_load_tokenized_with_empty_row(tmp_path):
+    path = str(tmp_path / 'set.csv')
+    write_dataset(path, [['안녕하세요', 0], ['', 1], ['여기로 입금해', 1], ['잘 지내?', 0], ['', 0]])
+    data = load_tokenized(path, Tokenizer(), 16, str(tmp_path / 'cache'))
+    assert len(data['train']) + len(data['test']) == 3
+    assert sorted(list(data['train']['length']) + list(data['test']['length'])) == [5, 5, 7]
@@ -0,0 +1,75 @@
+import json
+import time
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from history_store import HistoryStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / 'scan_history.db'))
+    yield store
+    store.close()
+
+
+def entry(chat_id, result='정상 대화', days_ago=0, **extra):
+    stamp = (datetime.now() - timedelta(days=days_ago)).strftime('%Y-%m-%d %H:%M:%S')
+    return {'chat_id': chat_id, 'user': f'user{chat_id}', 'result': result, 'score': 0.1, 'time': stamp, **extra}
+
+
+def test_query_pages_newest_first(store):
+    store.append_many(entry(i) for i in range(5))
+    first = store.query(limit=2)
+    assert [row['chat_id'] for row in first] == [4, 3]
+    rest = store.query(before_id=first[-1]['id'], limit=10)
+    assert [row['chat_id'] for row in rest] == [2, 1, 0]
+
+
+def test_filters_and_count(store):
+    store.append(entry(1, '로맨스 스캠'))
+    store.append(entry(1))
+    store.append(entry(2, '로맨스 스캠'))
+    assert store.count(result='로맨스 스캠') == 2
+    assert [row['chat_id'] for row in store.query(chat_id=1, result='로맨스 스캠')] == [1]
+
+
+def test_indicators_round_trip(store):
+    store.append(entry(1, indicators=['betting:bet.co', 'crypto:업비트']))
+    store.append(entry(2))
+    rows = {row['chat_id']: row for row in store.query()}
+    assert rows[1]['indicators'] == ['betting:bet.co', 'crypto:업비트']
+    assert rows[2]['indicators'] == []
+
+
+def test_retention_by_age_and_rows(store):
+    store.append_many([entry(0, days_ago=40)] + [entry(i) for i in range(1, 6)])
+    assert store.apply_retention(max_age_days=30, max_rows=3) == 3
+    assert [row['chat_id'] for row in store.query()] == [5, 4, 3]
+
+
+def test_legacy_log_import(tmp_path):
+    legacy = tmp_path / 'scan_log.json'
+    # 기존 JSON 로그는 최신 항목이 앞에 있음
+    legacy.write_text(json.dumps([entry(2), entry(1)], ensure_ascii=False), encoding='utf-8')
+    store = HistoryStore(str(tmp_path / 'scan_history.db'), legacy_log=str(legacy))
+    assert [row['chat_id'] for row in store.query()] == [2, 1]
+    assert not legacy.exists()
+    store.close()
+
+
+def test_migrates_database_without_indicators(tmp_path):
+    path = str(tmp_path / 'scan_history.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE scan_log (id INTEGER PRIMARY KEY AUTOINCREMENT, chat_id INTEGER, user TEXT NOT NULL, '
+                 'result TEXT NOT NULL, score REAL, time TEXT NOT NULL, ts REAL NOT NULL)')
+    conn.execute("INSERT INTO scan_log (chat_id, user, result, score, time, ts) VALUES (1, 'old', '정상 대화', 0.1, "
+                 "'2026-01-01 00:00:00', ?)", (time.time(),))
+    conn.commit()
+    conn.close()
+    store = HistoryStore(path)
+    store.append(entry(2, indicators=['wallet:trc20']))
+    assert [(row['user'], row['indicators']) for row in store.query()] == [('user2', ['wallet:trc20']), ('old', [])]
+    store.close()
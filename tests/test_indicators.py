@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+import indicators
+from indicators import IndicatorMatcher, CompiledIndicators, Automaton
+
+
+@pytest.fixture
+def matcher(tmp_path):
+    return IndicatorMatcher(str(tmp_path / 'scam_indicators.jsonl'))
+
+
+def ids(matcher, text):
+    return [hit['id'] for hit in matcher.match(text)]
+
+
+@pytest.mark.parametrize('text', [
+    '2024-01-15',
+    '2025-10-17 입금 예정',
+    '2024-01-15 에 은행 가자',
+    '02-123-4567',
+    '계좌 02-123-4567',
+    '은행 가서 031-123-4567 로 전화해',
+    '010-1234-5678',
+    '내 번호 123-456-789012',
+])
+def test_bank_account_false_positives(matcher, text):
+    assert 'account:bank_account' not in ids(matcher, text)
+
+
+@pytest.mark.parametrize('text', [
+    '국민 123456-78-901234',
+    '국민은행 계좌는 123456-78-901234 입니다',
+    '123-456-789012 신한으로 보내줘',
+    '입금 계좌 알려드릴게요 농협 302-1234-5678-91',
+])
+def test_bank_account_near_bank_word(matcher, text):
+    assert 'account:bank_account' in ids(matcher, text)
+
+
+def test_domain_boundaries(matcher):
+    assert ids(matcher, '여기 bet.co 들어가서 가입해') == ['betting:bet.co']
+    assert ids(matcher, 'alphabet.com 검색해봐') == []
+    assert ids(matcher, 'bet.com 아님') == []
+
+
+def test_wallet_and_sorting(matcher):
+    hits = matcher.match('TQn9Y2khEsLJW1ChVWFMSMeRDow5KcbLSE 로 usdt 보내')
+    assert [hit['id'] for hit in hits] == ['wallet:trc20', 'crypto:usdt']
+    assert hits[0]['weight'] >= indicators.STRONG_INDICATOR
+
+
+def test_keywords_ignore_spacing(matcher):
+    assert 'account:가상계좌' in ids(matcher, '가상 계좌로 보내주세요')
+
+
+def test_global_flag_pattern_is_dropped():
+    compiled = CompiledIndicators([
+        {'type': 'regex', 'pattern': '(?i)송금', 'category': 'account'},
+        {'type': 'regex', 'pattern': '환불', 'category': 'refund'},
+    ])
+    assert compiled.count == 1 and len(compiled.invalid) == 1
+    assert 'refund:환불' in compiled.scan('환불 해드릴게요', {})
+
+
+def test_duplicate_group_names_fall_back_to_separate_regexes():
+    compiled = CompiledIndicators([
+        {'type': 'regex', 'pattern': '(?P<n>가+)', 'category': 'a'},
+        {'type': 'regex', 'pattern': '(?P<n>나+)', 'category': 'b'},
+    ])
+    assert compiled.regex is None
+    assert set(compiled.scan('가가 나', {})) == {'a:(?P<n>가+)', 'b:(?P<n>나+)'}
+
+
+def test_bad_entries_are_skipped(tmp_path):
+    path = tmp_path / 'scam_indicators.jsonl'
+    path.write_text('# 주석\n{bad\n[1, 2]\n' + json.dumps({'type': 'domain', 'pattern': 'evil.example',
+                                                         'weight': 'high'}) + '\n', encoding='utf-8')
+    matcher = IndicatorMatcher(str(path))
+    assert len(matcher) == len(indicators.DEFAULT_INDICATORS)
+    assert len(matcher.compiled.invalid) == 2
+
+
+def test_initial_reload_failure_uses_defaults(tmp_path, monkeypatch):
+    def broken(path):
+        raise OSError('읽기 실패')
+    monkeypatch.setattr(indicators, 'read_indicators', broken)
+    path = tmp_path / 'scam_indicators.jsonl'
+    path.write_text('', encoding='utf-8')
+    matcher = IndicatorMatcher(str(path))
+    assert len(matcher) == len(indicators.DEFAULT_INDICATORS)
+    assert ids(matcher, 'bet.co') == ['betting:bet.co']
+
+
+def test_hot_reload(tmp_path):
+    path = tmp_path / 'scam_indicators.jsonl'
+    matcher = IndicatorMatcher(str(path))
+    assert ids(matcher, 'evil.example 접속') == []
+    path.write_text(json.dumps({'type': 'domain', 'pattern': 'evil.example', 'category': 'phishing',
+                                'weight': 0.9}) + '\n', encoding='utf-8')
+    matcher._checked = 0
+    assert ids(matcher, 'evil.example 접속') == ['phishing:evil.example']
+
+
+def test_automaton_matches_naive_search():
+    words = ['he', 'she', 'his', 'hers', 'usdt', 'us']
+    automaton = Automaton()
+    for word in words:
+        automaton.add_word(word, word)
+    automaton.make_automaton()
+    text = 'ushers usdt his'
+    found = sorted((end, word) for end, word in automaton.iter(text))
+    naive = sorted((i + len(w) - 1, w) for w in words for i in range(len(text)) if text.startswith(w, i))
+    assert found == naive
@@ -0,0 +1,146 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from inference import (InferenceEngine, build_windows, aggregate_scores, chain_future, split_messages,
+                       MESSAGE_SEP)
+
+CLS, SEP = 100, 101
+
+
+def messages(*lengths):
+    return [[i + 1] * length for i, length in enumerate(lengths)]
+
+
+def test_single_window():
+    assert build_windows(messages(2, 3), CLS, SEP) == [[CLS, 1, 1, SEP, 2, 2, 2, SEP]]
+
+
+def test_empty_conversation():
+    assert build_windows([], CLS, SEP) == []
+    assert build_windows([[], []], CLS, SEP) == []
+
+
+def test_empty_messages_are_skipped():
+    assert build_windows([[], [5, 5], []], CLS, SEP) == [[CLS, 5, 5, SEP]]
+
+
+def test_oversize_message_is_truncated():
+    windows = build_windows(messages(50), CLS, SEP, max_length=12)
+    assert windows == [[CLS] + [1] * 10 + [SEP]]
+
+
+def test_oversize_message_between_others():
+    windows = build_windows(messages(3, 50, 3), CLS, SEP, max_length=12, overlap=0)
+    assert all(len(window) <= 12 for window in windows)
+    assert [window[1] for window in windows] == [1, 2, 3]
+
+
+def test_overlap_repeats_tail_messages():
+    windows = build_windows(messages(10, 10, 10), CLS, SEP, max_length=24, overlap=11)
+    assert windows == [
+        [CLS] + [1] * 10 + [SEP] + [2] * 10 + [SEP],
+        [CLS] + [2] * 10 + [SEP] + [3] * 10 + [SEP],
+    ]
+
+
+def test_overlap_too_small_for_tail_message():
+    windows = build_windows(messages(10, 10, 10), CLS, SEP, max_length=24, overlap=10)
+    assert windows == [
+        [CLS] + [1] * 10 + [SEP] + [2] * 10 + [SEP],
+        [CLS] + [3] * 10 + [SEP],
+    ]
+
+
+def test_windows_always_advance():
+    # 겹침이 윈도우보다 커도 같은 윈도우를 반복하지 않음
+    windows = build_windows(messages(*[5] * 20), CLS, SEP, max_length=14, overlap=1000)
+    assert len(windows) == 19
+    assert all(len(window) <= 14 for window in windows)
+    assert windows[-1][-2] == 20
+
+
+@pytest.mark.parametrize('rule, expected', [('max', 0.9), ('mean', 0.42), ('last_k', 0.45)])
+def test_aggregate_scores(rule, expected):
+    assert aggregate_scores([0.1, 0.2, 0.9, 0.3, 0.6], rule, last_k=2) == pytest.approx(expected)
+
+
+def test_aggregate_empty_and_unknown():
+    assert aggregate_scores([]) == 0.0
+    with pytest.raises(ValueError):
+        aggregate_scores([0.5], 'median')
+
+
+def test_split_messages():
+    assert split_messages(MESSAGE_SEP.join(['안녕', ' ', '반가워 '])) == ['안녕', '반가워']
+    assert split_messages(None) == []
+
+
+def test_chain_future_propagates_cancel():
+    source, target = Future(), Future()
+    chain_future(source, target)
+    target.cancel()
+    assert source.cancelled()
+
+
+class Tokenizer:
+    cls_token_id = CLS
+    sep_token_id = SEP
+
+    def __call__(self, texts, add_special_tokens=True, truncation=False, max_length=None):
+        if isinstance(texts, str):
+            return {'input_ids': [CLS, len(texts), SEP]}
+        return {'input_ids': [[len(text)] * len(text) for text in texts]}
+
+
+class Model:
+    def __init__(self):
+        self.batches = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def predict(self, batch):
+        self.entered.set()
+        self.release.wait()
+        self.batches.append(len(batch))
+        # 윈도우에 3글자 메시지가 있으면 스캠으로 봄
+        return [0.9 if 3 in ids else 0.1 for ids in batch]
+
+
+@pytest.fixture
+def engine():
+    model = Model()
+    engine = InferenceEngine(lambda: (Tokenizer(), model), max_wait_ms=5)
+    engine.ready.wait()
+    yield engine, model
+    model.release.set()
+    engine.close()
+
+
+def test_engine_conversation(engine):
+    engine, _ = engine
+    assert engine.submit_conversation(['안녕하세요', '입금해']).result(5) == 0.9
+    assert engine.submit_conversation(['안녕하세요']).result(5) == 0.1
+    assert engine.submit_conversation([]).result(5) == 0.0
+
+
+def test_prepare_then_submit_windows(engine):
+    engine, _ = engine
+    prob, windows = engine.prepare_conversation(['입금해'])
+    assert prob is None and windows == [[CLS, 3, 3, 3, SEP]]
+    assert engine.submit_windows(windows).result(5) == 0.9
+
+
+def test_cancelled_conversation_skips_model(engine):
+    engine, model = engine
+    model.release.clear()
+    blocker = engine.submit_conversation(['안녕하세요'])
+    # 첫 요청이 모델 안에서 대기하는 동안 두 번째 요청이 큐에 들어감
+    assert model.entered.wait(5)
+    cancelled = engine.submit_conversation(['입금해'])
+    assert cancelled.cancel()
+    model.release.set()
+    assert blocker.result(5) == 0.1
+    assert sum(model.batches) == 1
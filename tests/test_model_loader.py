@@ -0,0 +1,59 @@
+import os
+import threading
+
+import pytest
+import torch
+from transformers import ElectraConfig, ElectraForSequenceClassification
+
+from model_loader import (TorchClassifier, SharedTorchClassifier, PARITY_BACKENDS, SAFETENSORS_FILE,
+                          pad_rows)
+
+
+@pytest.fixture(scope='module')
+def model_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('tiny'))
+    torch.manual_seed(0)
+    config = ElectraConfig(vocab_size=64, embedding_size=16, hidden_size=16, num_hidden_layers=1,
+                           num_attention_heads=2, intermediate_size=32, max_position_embeddings=32, num_labels=2)
+    ElectraForSequenceClassification(config).save_pretrained(path)
+    return path
+
+
+def test_pad_rows():
+    input_ids, attention_mask = pad_rows([[1, 2, 3], [4]], 0)
+    assert input_ids.tolist() == [[1, 2, 3], [4, 0, 0]]
+    assert attention_mask.tolist() == [[1, 1, 1], [1, 0, 0]]
+
+
+def test_mmap_backend_matches_torch(model_path):
+    rows = [[2, 5, 9, 3], [2, 7, 3]]
+    assert SharedTorchClassifier(model_path, 0).predict(rows) == pytest.approx(
+        TorchClassifier(model_path, 0).predict(rows))
+
+
+def test_mmap_backend_does_not_leak_meta_tensors(model_path):
+    # 다른 스레드가 같은 시점에 만드는 모듈은 실제 메모리에 생성되어야 함
+    started, devices = threading.Event(), []
+
+    def build():
+        started.wait()
+        devices.extend(p.device.type for p in torch.nn.Linear(4, 4).parameters())
+
+    builder = threading.Thread(target=build)
+    builder.start()
+    started.set()
+    classifier = SharedTorchClassifier(model_path, 0)
+    builder.join()
+    assert set(devices) == {'cpu'}
+    assert {p.device.type for p in classifier.model.parameters()} == {'cpu'}
+    assert {b.device.type for b in classifier.model.buffers()} == {'cpu'}
+
+
+def test_mmap_backend_requires_safetensors(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        SharedTorchClassifier(str(tmp_path), 0)
+    assert not os.path.exists(tmp_path / SAFETENSORS_FILE)
+
+
+def test_mmap_not_in_default_parity():
+    assert 'mmap' not in PARITY_BACKENDS
@@ -0,0 +1,174 @@
+import time
+import asyncio
+from types import SimpleNamespace
+from concurrent.futures import Future
+
+import pytest
+from telethon import errors
+
+import scan_service
+from scheduler import CycleBudget
+from scan_service import ScanService, WindowSlots
+
+
+class Client:
+    def add_event_handler(self, *args):
+        pass
+
+
+class SlowEngine:
+    # 토큰화와 큐 넣기가 오래 걸리는 엔진
+    def __init__(self, windows=2, delay=0.3, prob=0.7):
+        self.windows = windows
+        self.delay = delay
+        self.prob = prob
+        self.submitted = 0
+
+    def prepare_conversation(self, messages):
+        time.sleep(self.delay)
+        return None, [[0]] * self.windows
+
+    def submit_windows(self, windows):
+        time.sleep(self.delay)
+        self.submitted += len(windows)
+        future = Future()
+        future.set_result(self.prob)
+        return future
+
+
+@pytest.fixture
+def service(tmp_path):
+    def make(engine):
+        return ScanService(Client(), engine, str(tmp_path))
+    return make
+
+
+def test_infer_does_not_block_event_loop(service):
+    svc = service(SlowEngine())
+
+    async def run():
+        ticks = []
+
+        async def heartbeat():
+            while True:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.02)
+
+        beat = asyncio.create_task(heartbeat())
+        prob = await svc._infer(1, ['안녕'])
+        beat.cancel()
+        return prob, max(b - a for a, b in zip(ticks, ticks[1:]))
+
+    prob, longest_gap = asyncio.run(run())
+    assert prob == 0.7
+    assert longest_gap < 0.2
+    svc.close()
+
+
+def test_stale_scan_cancelled_while_preparing(service):
+    engine = SlowEngine()
+    svc = service(engine)
+
+    async def run():
+        task = asyncio.create_task(svc._infer(1, ['안녕']))
+        await asyncio.sleep(0.1)
+        svc._cancel_stale(1)
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert engine.submitted == 0
+    svc.close()
+
+
+def test_window_slots_count_windows():
+    async def run():
+        slots = WindowSlots(4)
+        order = []
+
+        async def job(name, count, hold):
+            async with slots.hold(count):
+                order.append((name, slots.used))
+                await asyncio.sleep(hold)
+
+        await asyncio.gather(job('a', 3, 0.05), job('b', 2, 0), job('c', 1, 0))
+        # b(2개)는 a(3개)가 끝날 때까지 기다리고, c(1개)는 바로 들어감
+        return order
+
+    assert asyncio.run(run()) == [('a', 3), ('c', 4), ('b', 2)]
+
+
+def test_window_slots_admit_oversize_when_idle():
+    async def run():
+        slots = WindowSlots(4)
+        async with slots.hold(10):
+            return slots.used
+
+    assert asyncio.run(run()) == 10
+
+
+def test_media_only_chat_not_fetched_again(service, monkeypatch):
+    svc = service(SlowEngine())
+    fetched = []
+
+    async def fetch_history(client, entity, limit, min_id=0):
+        fetched.append(min_id)
+        # 사진·서비스 메시지만 있는 채팅
+        return [(7, ''), (6, '')]
+
+    monkeypatch.setattr(scan_service, 'fetch_history', fetch_history)
+    dialog = SimpleNamespace(id=1, name='사진방', entity=None, latest_message_id=7)
+
+    async def run():
+        return [await svc.scan_dialogs([dialog]) for _ in range(2)]
+
+    first, second = asyncio.run(run())
+    assert first['skipped'] == second['skipped'] == 1
+    assert fetched == [0]
+    assert svc.state.get(1)['last_message_id'] == 7
+    svc.close()
+
+
+def test_flood_wait_releases_fetch_slot(service):
+    svc = service(SlowEngine())
+    slot = asyncio.Semaphore(1)
+    calls = []
+
+    async def fetch():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise errors.FloodWaitError(request=None, capture=1)
+        return 'ok'
+
+    async def run():
+        task = asyncio.create_task(svc._request(fetch, slot=slot))
+        await asyncio.sleep(0.2)
+        # 대기 중에는 자리를 놓고 있어야 함
+        assert not slot.locked()
+        return await task
+
+    assert asyncio.run(run()) == 'ok'
+    assert calls[1] - calls[0] >= 1
+    svc.close()
+
+
+def test_flood_wait_longer_than_budget_defers_cycle(service, monkeypatch):
+    svc = service(SlowEngine())
+    fetched = []
+
+    async def fetch_history(client, entity, limit, min_id=0):
+        fetched.append(entity)
+        raise errors.FloodWaitError(request=None, capture=3600)
+
+    monkeypatch.setattr(scan_service, 'fetch_history', fetch_history)
+    dialogs = [SimpleNamespace(id=i, name=f'채팅{i}', entity=i, latest_message_id=1) for i in range(3)]
+
+    async def run():
+        return await asyncio.wait_for(svc.scan_dialogs(dialogs, CycleBudget(seconds=60)), 5)
+
+    counts = asyncio.run(run())
+    assert counts['deferred'] == 3
+    assert counts['errors'] == 0
+    # 첫 요청에서 막힌 뒤 나머지 채팅은 요청을 보내지 않음
+    assert len(fetched) <= svc.concurrency
+    svc.close()
@@ -0,0 +1,126 @@
+import time
+import asyncio
+from types import SimpleNamespace
+
+import scheduler
+from scheduler import TokenBucket, CycleBudget, ScanScheduler, chat_priority
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+
+
+def fake_clock(monkeypatch):
+    # 이벤트 루프가 쓰는 time/asyncio는 그대로 두고 scheduler 모듈이 보는 것만 교체
+    clock = Clock()
+    monkeypatch.setattr(scheduler, 'time', SimpleNamespace(monotonic=clock.monotonic, time=time.time))
+    monkeypatch.setattr(scheduler, 'asyncio', SimpleNamespace(sleep=clock.sleep))
+    return clock
+
+
+def test_bucket_allows_burst_then_rate(monkeypatch):
+    clock = fake_clock(monkeypatch)
+    bucket = TokenBucket(rate=8, capacity=4)
+
+    async def take(count):
+        for _ in range(count):
+            await bucket.acquire()
+
+    start = clock.now
+    asyncio.run(take(4))
+    assert clock.now == start
+    asyncio.run(take(8))
+    assert clock.now - start == 1.0
+
+
+def test_bucket_backoff_blocks_all_requests(monkeypatch):
+    clock = fake_clock(monkeypatch)
+    bucket = TokenBucket(rate=8, capacity=4)
+    bucket.backoff(30)
+    start = clock.now
+    asyncio.run(bucket.acquire())
+    assert clock.now - start == 30
+    # 대기하는 동안 채워진 토큰(버스트 한도)만큼은 바로 보낼 수 있음
+    assert bucket.tokens == 3
+
+
+def test_bucket_without_rate_is_unlimited(monkeypatch):
+    clock = fake_clock(monkeypatch)
+    bucket = TokenBucket(rate=0, capacity=0)
+    start = clock.now
+
+    async def take():
+        for _ in range(100):
+            await bucket.acquire()
+
+    asyncio.run(take())
+    assert clock.now == start
+
+
+def test_cycle_budget_inferences():
+    budget = CycleBudget(seconds=0, inferences=2)
+    assert not budget.expired()
+    assert [budget.take_inference() for _ in range(3)] == [True, True, False]
+    unlimited = CycleBudget(seconds=0, inferences=0)
+    assert all(unlimited.take_inference() for _ in range(100))
+
+
+def test_cycle_budget_deadline(monkeypatch):
+    clock = fake_clock(monkeypatch)
+    budget = CycleBudget(seconds=60, inferences=0)
+    clock.now += 59
+    assert not budget.expired()
+    clock.now += 1
+    assert budget.expired()
+
+
+class States:
+    def __init__(self, states):
+        self.states = states
+
+    def get(self, dialog_id):
+        return self.states.get(dialog_id, {})
+
+
+def dialog(peer_id, latest):
+    return SimpleNamespace(id=peer_id, latest_message_id=latest)
+
+
+def test_priority_prefers_new_messages_and_risk():
+    now = time.time()
+    quiet = {'last_message_id': 10, 'score': 0.1, 'scanned_at': now}
+    active = {'last_message_id': 5, 'score': 0.1, 'scanned_at': now}
+    risky = {'last_message_id': 10, 'score': 0.9, 'scanned_at': now}
+    assert chat_priority(dialog(1, 10), active, now) > chat_priority(dialog(1, 10), quiet, now)
+    assert chat_priority(dialog(1, 10), risky, now) > chat_priority(dialog(1, 10), quiet, now)
+
+
+def test_order_puts_unscanned_and_active_first():
+    now = time.time()
+    states = States({
+        1: {'last_message_id': 10, 'score': 0.1, 'scanned_at': now},
+        2: {'last_message_id': 5, 'score': 0.1, 'scanned_at': now},
+    })
+    order = ScanScheduler().order([dialog(1, 10), dialog(2, 10), dialog(3, 10)], states)
+    assert [d.id for d in order] == [3, 2, 1]
+
+
+def test_budget_outlasts_long_block(monkeypatch):
+    clock = fake_clock(monkeypatch)
+    bucket = TokenBucket(rate=8, capacity=4)
+    budget = CycleBudget(seconds=60)
+    bucket.backoff(30)
+    assert bucket.blocked_for() == 30
+    assert not budget.outlasts(bucket.blocked_for())
+    bucket.backoff(600)
+    assert budget.outlasts(bucket.blocked_for())
+    clock.now += 600
+    assert bucket.blocked_for() == 0
+    assert not CycleBudget(seconds=0).outlasts(3600)
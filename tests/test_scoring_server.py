@@ -0,0 +1,63 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import Future
+
+import pytest
+
+from scoring_server import ScoringService, serve
+
+
+class Engine:
+    ready = threading.Event()
+    load_error = None
+    model = None
+
+    def submit_conversation(self, messages):
+        future = Future()
+        future.set_result(0.9 if any('입금' in m for m in messages) else 0.1)
+        return future
+
+
+@pytest.fixture(scope='module')
+def url():
+    server = serve(ScoringService(Engine()), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/score'
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, payload):
+    request = urllib.request.Request(url, json.dumps(payload).encode('utf-8'), {'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_score_texts(url):
+    status, body = post(url, {'texts': ['안녕', '여기로 입금해']})
+    assert status == 200
+    assert [result['probability'] for result in body['results']] == [0.1, 0.9]
+
+
+def test_score_single_text(url):
+    status, body = post(url, {'text': '안녕'})
+    assert status == 200 and len(body['results']) == 1
+
+
+@pytest.mark.parametrize('payload', [
+    {'texts': '문자열'},
+    {'texts': {'a': '안녕'}},
+    {'texts': ['안녕', 3]},
+    {'text': ['안녕']},
+    {'text': None},
+    {},
+    ['안녕'],
+])
+def test_bad_requests(url, payload):
+    status, body = post(url, payload)
+    assert status == 400 and body['error'] == 'bad_request'
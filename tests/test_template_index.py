@@ -0,0 +1,63 @@
+import csv
+
+import pytest
+
+from inference import MESSAGE_SEP
+from template_index import TemplateIndex, build, STRONG_MATCH, MATCH_THRESHOLD
+
+SCRIPT = '자기야 이번에 좋은 투자처가 있는데 코인 거래소에 같이 가입해보자'
+
+
+@pytest.fixture
+def index(tmp_path):
+    return TemplateIndex(str(tmp_path / 'scam_templates.jsonl'))
+
+
+def test_exact_and_near_duplicate_match(index):
+    assert index.add([SCRIPT], 'test') == 1
+    exact = index.match(SCRIPT)
+    assert exact['template_id'] == 0 and exact['similarity'] == 1.0
+    near = index.match(SCRIPT.replace('자기야', '여보'))
+    assert near is not None and near['similarity'] >= MATCH_THRESHOLD
+
+
+def test_unrelated_and_short_texts_do_not_match(index):
+    index.add([SCRIPT], 'test')
+    assert index.match('오늘 점심은 김치찌개 먹으러 회사 앞 식당에 갈까요') is None
+    assert index.match('자기야') is None
+
+
+def test_add_skips_duplicates_and_persists(tmp_path, index):
+    assert index.add([SCRIPT, SCRIPT + '!', '짧은 말'], 'test') == 1
+    reloaded = TemplateIndex(str(tmp_path / 'scam_templates.jsonl'))
+    assert len(reloaded) == 1
+    assert reloaded.match(SCRIPT)['similarity'] >= STRONG_MATCH
+
+
+def test_seed_and_local_templates_are_merged(tmp_path):
+    seed = TemplateIndex(str(tmp_path / 'seed.jsonl'))
+    seed.add([SCRIPT], 'seed')
+    index = TemplateIndex(str(tmp_path / 'local.jsonl'), str(tmp_path / 'seed.jsonl'))
+    index.add(['계좌로 먼저 보증금을 입금해주시면 바로 수익금 출금이 가능합니다'], 'confirmed:1')
+    assert len(index) == 2
+    assert len(TemplateIndex(str(tmp_path / 'local.jsonl'))) == 1
+
+
+def test_match_many_picks_best(index):
+    index.add([SCRIPT], 'test')
+    best = index.match_many(['안녕하세요 오랜만이에요 잘 지냈어요?', SCRIPT])
+    assert best['similarity'] == 1.0
+
+
+def test_build_excludes_benign_phrases(tmp_path):
+    greeting = '안녕하세요 오늘 하루도 좋은 하루 보내세요'
+    dataset = tmp_path / 'set.csv'
+    with open(dataset, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['text', 'label'])
+        writer.writerow([MESSAGE_SEP.join([greeting, SCRIPT]), 1])
+        writer.writerow([MESSAGE_SEP.join([greeting, '네 감사합니다 내일 회의 자료 보내드릴게요']), 0])
+    index = build([str(dataset)], str(tmp_path / 'scam_templates.jsonl'))
+    assert len(index) == 1
+    assert index.match(SCRIPT) is not None
+    assert index.match(greeting) is None
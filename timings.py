@@ -0,0 +1,31 @@
+import json
+import time
+import logging
+import threading
+
+STARTUP_TIMINGS_FILE = 'startup_timings.json'
+
+logger = logging.getLogger('2racker.startup')
+
+
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self._lock = threading.Lock()
+
+    def mark(self, phase):
+        elapsed = time.perf_counter() - self.started
+        with self._lock:
+            self.phases.append((phase, elapsed))
+        logger.info('%s: %.3fs', phase, elapsed)
+        return elapsed
+
+    def save(self, path=STARTUP_TIMINGS_FILE):
+        with self._lock:
+            data = {phase: round(elapsed, 4) for phase, elapsed in self.phases}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+startup_timer = StartupTimer()
@@ -0,0 +1,248 @@
+import os
+import sys
+import json
+import glob
+import time
+import random
+import shutil
+import hashlib
+import logging
+import argparse
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from transformers import AutoTokenizer, AutoModelForSequenceClassification, get_linear_schedule_with_warmup
+
+from evaluation import load_splits, score_metrics, DATASET_PATH, TEST_SIZE, SEED
+from model_loader import pad_rows, MODEL_PATH, ONNX_FILE, PARITY_FILE
+
+BASE_MODEL = 'monologg/koelectra-base-discriminator'
+CHECKPOINT_DIR = './checkpoints'
+CACHE_DIR = './.cache/tokenized'
+MAX_LENGTH = 512
+BATCH_SIZE = 12
+EPOCHS = 10
+LEARNING_RATE = 5e-5
+BUCKET_BATCHES = 50
+PAD_MULTIPLE = 8
+SAVE_TOTAL_LIMIT = 2
+
+logger = logging.getLogger('2racker.train')
+
+
+def cache_key(dataset_path, tokenizer_name, max_length):
+    stat = os.stat(dataset_path)
+    raw = json.dumps([os.path.abspath(dataset_path), stat.st_size, stat.st_mtime, tokenizer_name, max_length,
+                      TEST_SIZE, SEED])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def load_tokenized(dataset_path, tokenizer, max_length, cache_dir=CACHE_DIR):
+    from datasets import load_from_disk
+    path = os.path.join(cache_dir, cache_key(dataset_path, tokenizer.name_or_path, max_length))
+    if os.path.exists(path):
+        logger.info('토큰화 캐시 사용: %s', path)
+        return load_from_disk(path)
+
+    # 패딩 없이 잘라내기만 하고, 길이를 저장해 길이별 배치 구성에 사용
+    def tokenize_fn(example):
+        encoded = tokenizer(example['text'], truncation=True, max_length=max_length)
+        encoded['length'] = [len(ids) for ids in encoded['input_ids']]
+        return encoded
+
+    splits = load_splits(dataset_path)
+    tokenized = splits.map(tokenize_fn, batched=True, remove_columns=['text'])
+    tokenized.save_to_disk(path)
+    # 저장된 arrow 파일을 다시 열어 메모리 매핑으로 사용
+    return load_from_disk(path)
+
+
+def bucket_batches(lengths, batch_size, seed, epoch, bucket_batches=BUCKET_BATCHES):
+    # 무작위로 섞은 뒤 큰 묶음 안에서 길이순 정렬 → 배치 순서를 다시 섞음 (에폭마다 재현 가능)
+    rng = random.Random(seed * 1000 + epoch)
+    order = list(range(len(lengths)))
+    rng.shuffle(order)
+    size = batch_size * bucket_batches
+    batches = []
+    for start in range(0, len(order), size):
+        bucket = sorted(order[start:start + size], key=lambda i: lengths[i], reverse=True)
+        batches.extend(bucket[i:i + batch_size] for i in range(0, len(bucket), batch_size))
+    rng.shuffle(batches)
+    return batches
+
+
+def collate(dataset, indices, pad_id):
+    rows = dataset.select(indices)
+    input_ids, attention_mask = pad_rows(rows['input_ids'], pad_id)
+    longest = input_ids.shape[1]
+    target = -(-longest // PAD_MULTIPLE) * PAD_MULTIPLE
+    if target > longest:
+        input_ids = np.pad(input_ids, ((0, 0), (0, target - longest)), constant_values=pad_id)
+        attention_mask = np.pad(attention_mask, ((0, 0), (0, target - longest)))
+    return (torch.from_numpy(input_ids), torch.from_numpy(attention_mask),
+            torch.tensor(rows['label'], dtype=torch.long))
+
+
+def evaluate(model, dataset, pad_id, batch_size):
+    model.eval()
+    order = sorted(range(len(dataset)), key=lambda i: dataset[i]['length'])
+    preds, labels, losses = {}, {}, []
+    with torch.no_grad():
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            input_ids, attention_mask, label = collate(dataset, indices, pad_id)
+            logits = model(input_ids=input_ids, attention_mask=attention_mask).logits
+            losses.append(F.cross_entropy(logits, label, reduction='sum').item())
+            for i, pred, gold in zip(indices, logits.argmax(dim=1).tolist(), label.tolist()):
+                preds[i], labels[i] = pred, gold
+    model.train()
+    labels = [labels[i] for i in range(len(dataset))]
+    preds = [preds[i] for i in range(len(dataset))]
+    return {'eval_loss': sum(losses) / len(dataset), **score_metrics(labels, preds)}, labels, preds
+
+
+def latest_checkpoint(checkpoint_dir):
+    paths = glob.glob(os.path.join(checkpoint_dir, 'checkpoint-*'))
+    return max(paths, key=lambda p: int(p.rsplit('-', 1)[1])) if paths else None
+
+
+def save_checkpoint(checkpoint_dir, model, optimizer, scheduler, state):
+    path = os.path.join(checkpoint_dir, f"checkpoint-{state['global_step']}")
+    model.save_pretrained(path)
+    torch.save({'optimizer': optimizer.state_dict(), 'scheduler': scheduler.state_dict(),
+                'torch_rng': torch.get_rng_state()}, os.path.join(path, 'training_state.pt'))
+    with open(os.path.join(path, 'trainer_state.json'), 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    for old in sorted(glob.glob(os.path.join(checkpoint_dir, 'checkpoint-*')),
+                      key=lambda p: int(p.rsplit('-', 1)[1]))[:-SAVE_TOTAL_LIMIT]:
+        shutil.rmtree(old, ignore_errors=True)
+    logger.info('체크포인트 저장: %s', path)
+
+
+def train(args):
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    torch.manual_seed(args.seed)
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    tokenizer = AutoTokenizer.from_pretrained(args.tokenizer or args.base_model)
+    pad_id = tokenizer.pad_token_id or 0
+    data = load_tokenized(args.dataset, tokenizer, args.max_length, args.cache_dir)
+    train_set, test_set = data['train'], data['test']
+    lengths = train_set['length']
+
+    steps_per_epoch = -(-len(bucket_batches(lengths, args.batch_size, args.seed, 0)) // args.grad_accum)
+    total_steps = steps_per_epoch * args.epochs
+    checkpoint = latest_checkpoint(args.checkpoint_dir) if args.resume else None
+    model = AutoModelForSequenceClassification.from_pretrained(checkpoint or args.base_model, num_labels=2)
+    model.train()
+    optimizer = torch.optim.AdamW(model.parameters(), lr=args.lr, weight_decay=args.weight_decay)
+    scheduler = get_linear_schedule_with_warmup(optimizer, int(total_steps * args.warmup_ratio), total_steps)
+    state = {'epoch': 0, 'batch': 0, 'global_step': 0, 'history': [], 'train_seconds': 0.0,
+             'samples': 0, 'tokens': 0, 'padded_tokens': 0}
+    if checkpoint:
+        saved = torch.load(os.path.join(checkpoint, 'training_state.pt'), weights_only=False)
+        optimizer.load_state_dict(saved['optimizer'])
+        scheduler.load_state_dict(saved['scheduler'])
+        torch.set_rng_state(saved['torch_rng'])
+        with open(os.path.join(checkpoint, 'trainer_state.json'), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        logger.info('%s 에서 이어서 학습 (epoch %d, batch %d)', checkpoint, state['epoch'], state['batch'])
+
+    started = time.perf_counter() - state['train_seconds']
+    for epoch in range(state['epoch'], args.epochs):
+        batches = bucket_batches(lengths, args.batch_size, args.seed, epoch)
+        running, count = 0.0, 0
+        for index in range(state['batch'], len(batches)):
+            input_ids, attention_mask, label = collate(train_set, batches[index], pad_id)
+            loss = model(input_ids=input_ids, attention_mask=attention_mask, labels=label).loss
+            (loss / args.grad_accum).backward()
+            running += loss.item()
+            count += 1
+            state['samples'] += len(label)
+            state['tokens'] += int(attention_mask.sum())
+            state['padded_tokens'] += input_ids.numel()
+            if (index + 1) % args.grad_accum == 0 or index + 1 == len(batches):
+                torch.nn.utils.clip_grad_norm_(model.parameters(), args.max_grad_norm)
+                optimizer.step()
+                scheduler.step()
+                optimizer.zero_grad()
+                state['global_step'] += 1
+                if args.logging_steps and state['global_step'] % args.logging_steps == 0:
+                    logger.info('step %d loss %.4f', state['global_step'], running / count)
+                if args.save_steps and state['global_step'] % args.save_steps == 0:
+                    state.update(batch=index + 1, train_seconds=time.perf_counter() - started)
+                    save_checkpoint(args.checkpoint_dir, model, optimizer, scheduler, state)
+
+        metrics, _, _ = evaluate(model, test_set, pad_id, args.eval_batch_size)
+        state['history'].append({'epoch': epoch + 1, 'train_loss': running / max(count, 1), **metrics})
+        logger.info('epoch %d: %s', epoch + 1, json.dumps(state['history'][-1]))
+        state.update(epoch=epoch + 1, batch=0, train_seconds=time.perf_counter() - started)
+        save_checkpoint(args.checkpoint_dir, model, optimizer, scheduler, state)
+    return model, tokenizer, test_set, state
+
+
+def write_report(args, model, tokenizer, test_set, state):
+    from sklearn.metrics import classification_report
+    metrics, labels, preds = evaluate(model, test_set, tokenizer.pad_token_id or 0, args.eval_batch_size)
+    report = {
+        'dataset': args.dataset,
+        'base_model': args.base_model,
+        'samples': len(test_set),
+        'metrics': metrics,
+        'classification_report': classification_report(labels, preds, digits=4, output_dict=True, zero_division=0),
+        'history': state['history'],
+        'train_seconds': state['train_seconds'],
+        # 실제로 처리한 패딩 비율과, max_length까지 고정 패딩했을 때의 비율
+        'padding_ratio': 1 - state['tokens'] / max(state['padded_tokens'], 1),
+        'padding_ratio_max_length': 1 - state['tokens'] / max(state['samples'] * args.max_length, 1),
+    }
+    print(classification_report(labels, preds, digits=4, zero_division=0))
+    with open(os.path.join(args.output, 'eval_report.json'), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='2Racker KoELECTRA 로맨스 스캠 분류기 학습 (CPU 최적화)')
+    parser.add_argument('--dataset', default=DATASET_PATH, help='text/label 열을 가진 .csv 또는 .parquet')
+    parser.add_argument('--base-model', default=BASE_MODEL)
+    parser.add_argument('--tokenizer', default=None)
+    parser.add_argument('--output', default=MODEL_PATH)
+    parser.add_argument('--checkpoint-dir', default=CHECKPOINT_DIR)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--max-length', type=int, default=MAX_LENGTH)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--eval-batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--grad-accum', type=int, default=1, help='gradient accumulation 단계 수')
+    parser.add_argument('--epochs', type=int, default=EPOCHS)
+    parser.add_argument('--lr', type=float, default=LEARNING_RATE)
+    parser.add_argument('--weight-decay', type=float, default=0.0)
+    parser.add_argument('--warmup-ratio', type=float, default=0.0)
+    parser.add_argument('--max-grad-norm', type=float, default=1.0)
+    parser.add_argument('--logging-steps', type=int, default=50)
+    parser.add_argument('--save-steps', type=int, default=0, help='0이면 에폭마다 저장')
+    parser.add_argument('--threads', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--resume', action='store_true', help='가장 최근 체크포인트에서 이어서 학습')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s %(message)s')
+
+    model, tokenizer, test_set, state = train(args)
+    model.save_pretrained(args.output)
+    tokenizer.save_pretrained(args.output)
+    # 가중치가 바뀌었으므로 이전 ONNX 변환본과 parity 검증 결과는 더 이상 유효하지 않음
+    for stale in (ONNX_FILE, PARITY_FILE):
+        path = os.path.join(args.output, stale)
+        if os.path.exists(path):
+            os.remove(path)
+            logger.warning('%s 삭제: model_loader.py export/parity 를 다시 실행하세요', path)
+    report = write_report(args, model, tokenizer, test_set, state)
+    logger.info('평가 결과: %s', json.dumps(report['metrics']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())